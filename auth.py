@@ -1,7 +1,14 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import asyncio
+import hashlib
 import os
+import threading
+import time
 
 # ─── Config ───────────────────────────────────────────────────────
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-keep-this-safe") # change this in production!
@@ -17,6 +24,105 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+# ─── Hashing Pool ─────────────────────────────────────────────────
+# bcrypt is deliberately slow CPU work; run it in a few worker processes
+# so a burst of logins can't tie up the request threadpool. Once more than
+# HASH_QUEUE_LIMIT hashes are waiting, new ones are refused with PoolBusy.
+# A worker that dies (OOM killer, a signal) breaks the whole executor; it's
+# replaced on the next call, and the hash that found it broken is retried
+# once on the new one.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", 64))
+
+class PoolBusy(Exception):
+    retry_after = 1     # seconds, sent back as Retry-After
+
+class HashPool:
+    def __init__(self, workers=HASH_WORKERS, queue_limit=HASH_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:      # started on first use
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _discard(self, executor):
+        with self._lock:
+            if self._executor is executor:  # not already replaced by another call
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self._rejected += 1
+                raise PoolBusy()
+            self._in_flight += 1
+        start = time.perf_counter()
+        completed = False
+        try:
+            loop = asyncio.get_running_loop()
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    result = await loop.run_in_executor(executor, fn, *args)
+                except BrokenProcessPool:
+                    self._discard(executor)
+                    if attempt:
+                        raise
+                    continue
+                completed = True
+                return result
+        finally:
+            elapsed = time.perf_counter() - start   # queue wait + hashing
+            with self._lock:
+                self._in_flight -= 1
+                if completed:
+                    self._completed += 1
+                    self._latency_total += elapsed
+                    self._latency_max = max(self._latency_max, elapsed)
+                else:
+                    self._failed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.workers),
+                "queue_limit": self.queue_limit,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_latency_ms": round(1000 * self._latency_total / self._completed, 2)
+                                  if self._completed else 0.0,
+                "max_latency_ms": round(1000 * self._latency_max, 2),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown()
+
+hash_pool = HashPool()
+
+async def hash_password_async(password: str) -> str:
+    return await hash_pool.run(hash_password, password)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await hash_pool.run(verify_password, plain, hashed)
+
 # ─── Token Creation ───────────────────────────────────────────────
 def create_token(username: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=TOKEN_EXPIRE_MINUTES)
@@ -28,4 +134,76 @@ def verify_token(token: str) -> str:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload.get("sub")   # returns username
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def decode_token(token: str):
+    # (username, expiry timestamp), or None for a bad or expired token
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub"), payload.get("exp")
+
+# ─── Token Cache ──────────────────────────────────────────────────
+# Clients resend the same token on every request, so remember what it
+# resolved to instead of decoding it and looking the user up again.
+TOKEN_CACHE_SIZE = 10_000
+TOKEN_CACHE_TTL = 300   # seconds; caps how stale a change made elsewhere can be
+
+class TokenCache:
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # token digest -> (username, user, expires at)
+        self._by_user = {}              # username -> token digests
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()   # never keep raw tokens around
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():             # token (or ttl) has expired
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, token, username, user, exp=None):
+        key = self._key(token)
+        expires = time.time() + self.ttl
+        if exp is not None:
+            expires = min(expires, exp)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (username, user, expires)
+            self._by_user.setdefault(username, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))   # least recently used
+
+    def invalidate_user(self, username):
+        # call whenever a user is deleted or changed
+        with self._lock:
+            for key in self._by_user.pop(username, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _drop(self, key):
+        username = self._entries.pop(key)[0]
+        keys = self._by_user.get(username)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[username]
+
+token_cache = TokenCache()
\ No newline at end of file
@@ -0,0 +1,100 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# ─── Borrow Benchmark ─────────────────────────────────────────────
+# Concurrent clients borrowing and returning books from a catalog of N
+# titles (default 20,000), two ways:
+#   before: SELECT the book by title (no index), then UPDATE it from a
+#           second connection, as borrow_book/return_book used to
+#   after:  DatabaseManager.update_availability, one conditional UPDATE
+#           on the unique title index
+# and how often two clients racing for the same book both "win".
+#
+#   python bench_borrow.py [N] [CLIENTS]
+
+DURATION = 3            # seconds of borrow/return per variant
+RACES = 200             # rounds of every client borrowing the same title
+
+def old_borrow(db_name, title, is_available=False):
+    with sqlite3.connect(db_name) as conn:
+        book = conn.execute("SELECT * FROM books WHERE title = ?", (title,)).fetchone()
+    if not book or bool(book[3]) == is_available:
+        return False
+    with sqlite3.connect(db_name) as conn:
+        conn.execute("UPDATE books SET is_available = ? WHERE title = ?", (int(is_available), title))
+        conn.commit()
+    return True
+
+def throughput(borrow, titles, clients):
+    done = [0] * clients
+    stop = time.perf_counter() + DURATION
+
+    def client(n):
+        rng = random.Random(n)
+        while time.perf_counter() < stop:
+            title = rng.choice(titles)
+            if borrow(title, False):
+                borrow(title, True)
+            done[n] += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(done) / DURATION
+
+def races(borrow, titles, clients):
+    # rounds in which more than one client was told it got the book
+    doubled = 0
+    for title in titles[:RACES]:
+        barrier = threading.Barrier(clients)
+        wins = []
+
+        def client():
+            barrier.wait()
+            if borrow(title, False):
+                wins.append(1)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        doubled += len(wins) > 1
+    return doubled
+
+def main(n, clients):
+    directory = tempfile.mkdtemp()
+    os.chdir(directory)                 # importing main opens ./library.db
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from main import DatabaseManager
+
+    titles = [f"Title {i}" for i in range(n)]
+    before = os.path.join(directory, "before.db")
+    with sqlite3.connect(before) as conn:
+        conn.execute("""CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                        author TEXT NOT NULL, is_available INTEGER DEFAULT 1)""")
+        conn.executemany("INSERT INTO books (title, author) VALUES (?, 'Someone')", [(t,) for t in titles])
+    after = DatabaseManager(os.path.join(directory, "after.db"))
+    with sqlite3.connect(after.db_name) as conn:
+        conn.executemany("INSERT INTO books (title, author) VALUES (?, 'Someone')", [(t,) for t in titles])
+
+    variants = {
+        "before": lambda title, available: old_borrow(before, title, available),
+        "after": after.update_availability,
+    }
+    print(f"{n:,} books, {clients} clients")
+    for name, borrow in variants.items():
+        ops = throughput(borrow, titles, clients)
+        print(f"{name:6}  {ops:8,.0f} borrow+return/s   "
+              f"double borrows: {races(borrow, titles[::-1], clients)}/{RACES}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8)
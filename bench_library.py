@@ -0,0 +1,118 @@
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+import tempfile
+import tracemalloc
+from simple_Library_system import Book, Library, read_books
+from library_snapshot import SnapshotLibrary
+
+# ─── Library Benchmark ────────────────────────────────────────────
+# Borrow and return against a catalog of N books (default 10^6), with the
+# title index against the linear scan Library used before it, and the peak
+# memory of saving and loading it as one JSON array vs streamed NDJSON, and
+# the cold start of a mapped binary snapshot.
+#
+#   python bench_library.py [N]
+
+LOOKUPS = 200
+
+class PlainBook:
+    # Book as it was before __slots__, for the memory comparison
+    def __init__(self, title, author):
+        self.title = title
+        self.author = author
+        self.is_available = True
+
+def linear_borrow(books, title):
+    # the old Library.borrow_book: walk the list until the title turns up
+    for book in books:
+        if book.title == title and book.is_available:
+            book.is_available = False
+            return
+
+def linear_return(books, title):
+    for book in books:
+        if book.title == title and not book.is_available:
+            book.is_available = True
+            return
+
+def timed(fn, titles):
+    start = time.perf_counter()
+    for title in titles:
+        fn(title)
+    return (time.perf_counter() - start) / len(titles)
+
+def book_memory(cls, n):
+    tracemalloc.start()
+    books = [cls(f"Title {i}", f"Author {i % 1000}") for i in range(n)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del books
+    return size
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def old_save(books, filename):
+    # the old Library.save_json: every book as a dict, then one json.dump
+    with open(filename, "w") as file:
+        json.dump([{"title": b.title, "author": b.author, "is_available": b.is_available}
+                   for b in books], file)
+
+def old_load(filename):
+    with open(filename) as file:
+        return [Book(item["title"], item["author"]) for item in json.load(file)]
+
+def persistence(library):
+    with tempfile.TemporaryDirectory() as directory:
+        array, ndjson = os.path.join(directory, "books.json"), os.path.join(directory, "books.ndjson")
+        for label, save, load, filename in (
+            ("JSON array", lambda: old_save(library.books, array), lambda: old_load(array), array),
+            ("NDJSON", lambda: library.save(ndjson), lambda: sum(1 for _ in read_books(ndjson)), ndjson),
+        ):
+            start = time.perf_counter()
+            saved = peak_memory(save)
+            middle = time.perf_counter()
+            loaded = peak_memory(load)
+            print(f"{label:10}  save {middle - start:5.2f}s peak {saved / 2**20:7.1f} MiB, "
+                  f"load {time.perf_counter() - middle:5.2f}s peak {loaded / 2**20:7.1f} MiB")
+        snapshot = os.path.join(directory, "books.snap")
+        start = time.perf_counter()
+        library.save_snapshot(snapshot)
+        middle = time.perf_counter()
+        with SnapshotLibrary(snapshot) as mapped:
+            mapped.find_book(library.books[-1].title)
+            opened = time.perf_counter()
+        print(f"snapshot    save {middle - start:5.2f}s, open + first lookup {(opened - middle) * 1e3:.2f} ms "
+              f"({os.path.getsize(snapshot) / 2**20:.1f} MiB file)")
+
+def main(n):
+    library = Library()
+    start = time.perf_counter()
+    for i in range(n):
+        library.add_book(Book(f"Title {i}", f"Author {i % 1000}"))
+    print(f"loaded {n:,} books in {time.perf_counter() - start:.2f}s")
+
+    titles = [f"Title {random.randrange(n)}" for _ in range(LOOKUPS)]
+    with contextlib.redirect_stdout(io.StringIO()):     # borrow/return print
+        indexed = timed(library.borrow_book, titles) + timed(library.return_book, titles)
+    linear = (timed(lambda t: linear_borrow(library.books, t), titles)
+              + timed(lambda t: linear_return(library.books, t), titles))
+    print(f"borrow + return, indexed: {indexed * 1e6:10.2f} µs")
+    print(f"borrow + return, linear:  {linear * 1e6:10.2f} µs   ({linear / indexed:,.0f}x slower)")
+
+    slots, plain = book_memory(Book, n), book_memory(PlainBook, n)
+    print(f"{n:,} books with __slots__: {slots / 2**20:7.1f} MiB, "
+          f"with __dict__: {plain / 2**20:7.1f} MiB")
+    persistence(library)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
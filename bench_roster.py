@@ -0,0 +1,109 @@
+import random
+import sys
+import time
+import tracemalloc
+from person import Person, Student, Teacher
+from roster import Roster, STUDENT
+
+# ─── Roster Benchmark ─────────────────────────────────────────────
+# Memory of N people (default 10^6; 80% students, 10% teachers) held as
+# objects with __dict__, as objects with __slots__ and as a columnar
+# Roster, and the time of finding the passing students and sorting by
+# grade each way.
+#
+#   python bench_roster.py [N]
+
+FIRST = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Heidi",
+         "Ivan", "Judy", "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil"]
+LAST = [f"Surname{i}" for i in range(500)]
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "History", "English"]
+
+class PlainPerson:
+    # the classes as they were before __slots__, for the memory comparison
+    def __init__(self, name, age):
+        self.name = name
+        self.age = age
+
+class PlainStudent(PlainPerson):
+    def __init__(self, name, age, grade):
+        super().__init__(name, age)
+        self.grade = grade
+
+class PlainTeacher(PlainPerson):
+    def __init__(self, name, age, subject):
+        super().__init__(name, age)
+        self.subject = subject
+
+def records(n, seed=1):
+    # (kind, name, age, grade or subject); names are built per record, as
+    # they would be coming out of a file or a query
+    rng = random.Random(seed)
+    for _ in range(n):
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        kind = rng.random()
+        if kind < 0.8:
+            yield "student", name, rng.randint(17, 25), rng.randint(0, 100)
+        elif kind < 0.9:
+            yield "teacher", name, rng.randint(25, 65), rng.choice(SUBJECTS)
+        else:
+            yield "person", name, rng.randint(18, 80), None
+
+def build_objects(n, person, student, teacher):
+    people = []
+    for kind, name, age, extra in records(n):
+        if kind == "student":
+            people.append(student(name, age, extra))
+        elif kind == "teacher":
+            people.append(teacher(name, age, extra))
+        else:
+            people.append(person(name, age))
+    return people
+
+def build_roster(n):
+    roster = Roster()
+    for kind, name, age, extra in records(n):
+        if kind == "student":
+            roster.add_student(name, age, extra)
+        elif kind == "teacher":
+            roster.add_teacher(name, age, extra)
+        else:
+            roster.add_person(name, age)
+    return roster
+
+def measured(build, n):
+    # (result, bytes still allocated once it's built)
+    tracemalloc.start()
+    result = build(n)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main(n):
+    plain, plain_size = measured(lambda n: build_objects(n, PlainPerson, PlainStudent, PlainTeacher), n)
+    del plain
+    people, slots_size = measured(lambda n: build_objects(n, Person, Student, Teacher), n)
+    roster, roster_size = measured(build_roster, n)
+    print(f"{n:,} people")
+    for label, size in (("objects, __dict__", plain_size), ("objects, __slots__", slots_size),
+                        ("Roster", roster_size)):
+        print(f"{label:19} {size / 2**20:7.1f} MiB  {size / n:6.1f} bytes/person")
+
+    passing, loop = timed(lambda: [p for p in people if isinstance(p, Student) and p.grade >= 50])
+    view, vector = timed(roster.passing)
+    assert len(passing) == len(view)
+    print(f"passing students, loop:   {loop * 1e3:8.1f} ms")
+    print(f"passing students, Roster: {vector * 1e3:8.1f} ms   ({loop / vector:,.0f}x faster)")
+
+    students = [p for p in people if isinstance(p, Student)]
+    _, loop = timed(lambda: sorted(students, key=lambda p: p.grade, reverse=True))
+    _, vector = timed(lambda: roster.filter(kind=STUDENT).sort_by("grade", reverse=True))
+    print(f"students by grade, sorted(): {loop * 1e3:8.1f} ms")
+    print(f"students by grade, Roster:   {vector * 1e3:8.1f} ms   ({loop / vector:,.0f}x faster)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
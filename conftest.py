@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# ─── Test Setup ───────────────────────────────────────────────────
+# The library and student apps at the top of the repo and the expense
+# tracker in expense_tracker/ are separate apps whose modules share names
+# (main, auth). Every test module is imported and run with its own app's
+# directory first on sys.path, and a same-named module the other app left
+# in sys.modules is dropped, so `import main` is always the main next to
+# the test, whichever directory pytest was started from.
+
+def use_app(directory):
+    directory = os.path.abspath(directory)
+    if sys.path[:1] != [directory]:
+        if directory in sys.path:
+            sys.path.remove(directory)
+        sys.path.insert(0, directory)
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if (path and os.path.exists(os.path.join(directory, name + ".py"))
+                and os.path.dirname(os.path.abspath(path)) != directory):
+            del sys.modules[name]
+
+def pytest_collectstart(collector):
+    if isinstance(collector, pytest.Module):
+        use_app(collector.path.parent)
+
+def pytest_runtest_setup(item):
+    use_app(item.path.parent)
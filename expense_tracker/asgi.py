@@ -0,0 +1,10 @@
+from database import DB_ASYNC
+
+# ─── App Selection ────────────────────────────────────────────────
+# uvicorn asgi:app serves the sync SQLAlchemy app by default, or its
+# AsyncSession twin when DB_ASYNC=1 (asyncpg / aiosqlite drivers).
+
+if DB_ASYNC:
+    from main_v2_async import app
+else:
+    from main_v2 import app
@@ -0,0 +1,202 @@
+import codecs
+import csv
+import inspect
+import json
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+# ─── Bulk Import ──────────────────────────────────────────────────
+# Reads an uploaded body of expenses as it streams in - a JSON array,
+# NDJSON or CSV with a header row - and hands rows to the app in batches.
+# Each batch is validated and inserted in one transaction on the
+# threadpool; bad rows are reported by number and skipped.
+
+BULK_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+MAX_ROW_SIZE = 1 << 20      # characters of one row held while waiting for the rest of it
+JSON_TAIL = 16              # a decode error this near the end of the buffer may be a token cut short
+
+FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv",
+}
+
+class BulkFormatError(Exception):
+    pass
+
+def detect_format(content_type):
+    return FORMATS.get((content_type or "").split(";")[0].strip().lower())
+
+# ─── Parsers ──────────────────────────────────────────────────────
+# each yields (row number, record, error) without holding the whole body;
+# a body that can't be read any further raises BulkFormatError
+
+async def iter_text(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    async for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+async def iter_lines(chunks):
+    buffer = ""
+    async for text in iter_text(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(buffer) > MAX_ROW_SIZE:
+            raise BulkFormatError(f"a line is over {MAX_ROW_SIZE} characters")
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def iter_ndjson(chunks):
+    number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line), None
+        except ValueError as exc:
+            yield number, None, f"invalid JSON: {exc}"
+
+async def iter_csv(chunks):
+    header = None
+    number = 0
+    pending = None
+    async for line in iter_lines(chunks):
+        pending = line if pending is None else pending + "\n" + line
+        if pending.count('"') % 2:          # a quoted field carries on
+            if len(pending) > MAX_ROW_SIZE:
+                raise BulkFormatError(f"row {number + 1} is over {MAX_ROW_SIZE} characters")
+            continue
+        record, pending = pending, None
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield number, None, f"expected {len(header)} columns, got {len(values)}"
+        else:
+            yield number, dict(zip(header, values)), None
+    if pending is not None:
+        yield number + 1, None, "unterminated quoted field"
+
+async def iter_json_array(chunks):
+    decoder = json.JSONDecoder()
+    buffer = ""
+    number = 0
+    started = finished = False
+    async for text in iter_text(chunks):
+        buffer += text
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise BulkFormatError("body is not a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                finished = True
+                break
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as exc:
+                # the rest of the element may not have arrived yet; an error
+                # with more of the body after it is a malformed element, and
+                # nothing after it can be trusted
+                if exc.msg.startswith("Unterminated string") or len(buffer) - exc.pos <= JSON_TAIL:
+                    break
+                raise BulkFormatError(f"invalid JSON in row {number + 1}: {exc.msg}") from None
+            number += 1
+            yield number, record, None
+        buffer = buffer[pos:]
+        if finished:
+            return
+        if len(buffer) > MAX_ROW_SIZE:
+            raise BulkFormatError(f"row {number + 1} is over {MAX_ROW_SIZE} characters")
+    raise BulkFormatError(f"invalid or truncated JSON after row {number}")
+
+PARSERS = {"json": iter_json_array, "ndjson": iter_ndjson, "csv": iter_csv}
+
+# ─── Import ───────────────────────────────────────────────────────
+
+def category_totals(expenses):
+    # category -> (amount, count) for a batch, so expense_totals gets one
+    # upsert per category instead of one per row
+    totals = {}
+    for expense in expenses:
+        total, count = totals.get(expense.category, (0, 0))
+        totals[expense.category] = (total + expense.amount, count + 1)
+    return totals
+
+def validate_row(model, record):
+    if not isinstance(record, dict):
+        return None, "expected an object"
+    try:
+        return model.model_validate(record), None
+    except ValidationError as exc:
+        return None, "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()
+        )
+
+async def import_expenses(request, model, insert_rows, check=None):
+    # insert_rows(list of validated models) -> number of rows inserted, once
+    # per batch; plain functions run on the threadpool, coroutines are awaited.
+    # check(model) -> error message or None rejects rows the model accepts
+    parse = PARSERS[detect_format(request.headers.get("content-type"))]
+    report = {"inserted": 0, "failed": 0, "errors": []}
+
+    def error(number, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": number, "error": message})
+
+    def validate(items):
+        valid = []
+        for number, record, problem in items:
+            expense = None
+            if not problem:
+                expense, problem = validate_row(model, record)
+            if not problem and check:
+                problem = check(expense)
+            if problem:
+                error(number, problem)
+            else:
+                valid.append(expense)
+        return valid
+
+    async def flush(items):
+        valid = await run_in_threadpool(validate, items)
+        if not valid:
+            return
+        if inspect.iscoroutinefunction(insert_rows):
+            report["inserted"] += await insert_rows(valid)
+        else:
+            report["inserted"] += await run_in_threadpool(insert_rows, valid)
+
+    batch = []
+    try:
+        async for item in parse(request.stream()):
+            batch.append(item)
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush(batch)
+                batch = []
+    except BulkFormatError as exc:
+        error(None, str(exc))
+    if batch:
+        await flush(batch)
+    return report
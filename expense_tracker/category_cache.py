@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+# ─── Category Cache ───────────────────────────────────────────────
+# Category lists are read on every page load and almost never change, so
+# each user's categories are kept in memory. Writes go through the cache
+# (added / renamed / removed) right after they commit; the TTL only bounds
+# how stale another worker process's copy can get. GET /categories needs
+# better than that, since its body goes out under an ETag taken from the
+# database: it passes the collection version it read, and an entry filled
+# at any other version is a miss.
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", 10000))    # users
+CATEGORY_CACHE_TTL = int(os.getenv("CATEGORY_CACHE_TTL", 300))        # seconds
+
+class CategoryCache:
+    def __init__(self, maxsize=CATEGORY_CACHE_SIZE, ttl=CATEGORY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # user id -> (expires at, collection version, {category id: name})
+        self._writes = 0                # bumped by every write, see fill()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, collection=None):
+        # {category id: name} in id order, or None when not cached (or, given
+        # a collection version, not cached at that version)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[user_id]
+                return None
+            if collection is not None and entry[1] != collection:
+                return None
+            self._entries.move_to_end(user_id)
+            return dict(entry[2])
+
+    def version(self):
+        with self._lock:
+            return self._writes
+
+    def fill(self, user_id, rows, version, collection=None):
+        # rows: (id, name) pairs read after version() returned `version`; if a
+        # write landed in between they may already be stale, so keep them out.
+        # collection: the categories version in the database when they were read
+        categories = dict(sorted(rows))
+        with self._lock:
+            if version == self._writes:
+                self._entries[user_id] = (time.time() + self.ttl, collection, categories)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)   # least recently used
+        return dict(categories)
+
+    def added(self, user_id, category_id, name):
+        with self._update(user_id) as categories:
+            if categories is not None:
+                categories[category_id] = name
+
+    def renamed(self, user_id, old_name, new_name):
+        with self._update(user_id) as categories:
+            if categories is not None:
+                for category_id, name in categories.items():
+                    if name == old_name:
+                        categories[category_id] = new_name
+
+    def removed(self, user_id, name):
+        with self._update(user_id) as categories:
+            if categories is not None:
+                for category_id in [i for i, n in categories.items() if n == name]:
+                    del categories[category_id]
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._writes += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+
+    @contextmanager
+    def _update(self, user_id):
+        # edit a cached entry in place, under the lock
+        with self._lock:
+            self._writes += 1
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                # edited past the version it was read at; the next versioned
+                # get() reads the database again
+                entry = self._entries[user_id] = (entry[0], None, entry[2])
+            yield entry[2] if entry is not None else None
+
+category_cache = CategoryCache()
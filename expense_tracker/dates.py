@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+# ─── Date Parsing ─────────────────────────────────────────────────
+# Expense dates used to be free text. These are the spellings the
+# migrations accept when they move them into a typed DATE column; where
+# day and month could be confused, day comes first.
+DATE_FORMATS = (
+    "%Y-%m-%d", "%Y/%m/%d", "%Y%m%d",
+    "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y",
+    "%d %b %Y", "%d %B %Y", "%b %d %Y", "%B %d %Y", "%b %d, %Y", "%B %d, %Y",
+)
+
+class UnparseableDates(ValueError):
+    def __init__(self, ids):
+        shown = ", ".join(map(str, ids[:50])) + (", ..." if len(ids) > 50 else "")
+        super().__init__(
+            f"{len(ids)} expense(s) have a date that can't be parsed; "
+            f"fix or delete them and restart. ids: {shown}"
+        )
+        self.ids = ids
+
+def parse_date(value):
+    # the date a stored value spells, or None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text).date()     # also ISO date-times
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+# ─── Period Totals ────────────────────────────────────────────────
+
+def period_totals(rows):
+    # (period, category, total) rows ordered by period -> one entry per period
+    periods = []
+    for period, category, total in rows:
+        if not periods or periods[-1]["period"] != period:
+            periods.append({"period": str(period), "total_spent": 0, "by_category": {}})
+        periods[-1]["by_category"][category] = round(total, 2)
+        periods[-1]["total_spent"] = round(periods[-1]["total_spent"] + total, 2)
+    return periods
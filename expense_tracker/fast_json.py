@@ -0,0 +1,48 @@
+import json
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:         # optional, pinned in requirements.txt; the standard library encoder is used instead
+    orjson = None
+
+# ─── Fast JSON Responses ──────────────────────────────────────────
+# Opt-in path for large list endpoints. Returning a response directly skips
+# FastAPI's jsonable_encoder walk, and RowLayout turns database rows (sqlite3
+# tuples or SQLAlchemy rows) into objects from a column layout fixed once at
+# import, so each row costs one dict(zip()) before orjson encodes the lot.
+# The library and student apps at the top of the repo import this copy
+# as expense_tracker.fast_json, as they do http_cache.
+
+def dumps(content):
+    if orjson is not None:
+        return orjson.dumps(content)        # dates as YYYY-MM-DD, like FastAPI
+    return json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+class RowLayout:
+    def __init__(self, *columns, **convert):
+        # columns in select-list order; convert: {column: function} for the
+        # few values that need fixing up, e.g. is_available=bool
+        self.columns = columns
+        self.convert = [(columns.index(name), fn) for name, fn in convert.items()]
+
+    def objects(self, rows):
+        columns, convert = self.columns, self.convert
+        if not convert:
+            return [dict(zip(columns, row)) for row in rows]
+        objects = []
+        for row in rows:
+            row = list(row)
+            for i, fn in convert:
+                row[i] = fn(row[i])
+            objects.append(dict(zip(columns, row)))
+        return objects
+
+    def response(self, rows, headers=None):
+        return FastJSONResponse(self.objects(rows), headers=headers)
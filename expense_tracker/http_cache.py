@@ -0,0 +1,35 @@
+import hashlib
+from fastapi import Response
+
+# ─── Conditional Requests ─────────────────────────────────────────
+# Every collection has a version counter in the database that each write
+# bumps inside its own transaction. The ETag is derived from those counters
+# alone, so a client polling with If-None-Match gets its 304 after a single
+# primary-key read, without the rows being queried or serialized.
+
+# clients may keep the body, but must revalidate before reusing it
+CACHE_CONTROL = "private, no-cache"
+
+def weak_etag(*parts):
+    # parts: whatever identifies the representation, e.g. user id and versions
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match, etag):
+    # weak comparison, as If-None-Match requires: the W/ prefix is ignored
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag
+               for candidate in if_none_match.split(","))
+
+def cache_headers(etag):
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def not_modified(request, etag):
+    # the 304 to send when the client's copy is current, else None
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
@@ -1,18 +1,229 @@
+import datetime
+import os
 import sqlite3
-from fastapi import FastAPI, HTTPException, Depends
+import threading
+from typing import Literal
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from auth import create_token, verify_token, hash_password, verify_password
+from auth import (
+    create_token, decode_token, hash_password_async, verify_password_async,
+    token_cache, hash_pool, PoolBusy,
+)
+from bulk_import import category_totals, detect_format, import_expenses
+from category_cache import category_cache
+from dates import UnparseableDates, parse_date, period_totals
+from http_cache import weak_etag, not_modified, cache_headers
+from fast_json import RowLayout
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, STREAM_BATCH_SIZE, NEXT_CURSOR_HEADER,
+    encode_cursor, decode_cursor, ndjson_lines,
+)
+
+# ─── Connection Pool ──────────────────────────────────────────────
+
+class ConnectionPool:
+    # one long-lived connection per worker thread, tuned once when opened
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",        # readers don't block the writer
+        "PRAGMA synchronous = NORMAL",      # safe with WAL, far fewer fsyncs
+        "PRAGMA cache_size = -20000",       # ~20 MB page cache per connection
+        "PRAGMA mmap_size = 268435456",     # 256 MB memory-mapped reads
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA busy_timeout = 5000",
+    )
+
+    def __init__(self, db_name, cached_statements=256):
+        self.db_name = db_name
+        self.cached_statements = cached_statements   # prepared statement LRU
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}                        # thread -> connection
+
+    def open(self):
+        # check_same_thread=False only so close_all() can run from any thread;
+        # each pooled connection is still used by the thread that opened it
+        conn = sqlite3.connect(
+            self.db_name,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.open()
+            self._local.conn = conn
+            with self._lock:
+                self._reap()
+                self._connections[threading.current_thread()] = conn
+        return conn
+
+    def _reap(self):
+        # the threadpool retires idle workers, close what they left behind
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            self._connections.pop(thread).close()
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+# ─── Migration Steps ──────────────────────────────────────────────
+
+BACKFILL_BATCH_SIZE = 5000
+
+class MigrationApplied(Exception):
+    # another process finished this migration while the lock was released
+    pass
+
+class DuplicateCategories(ValueError):
+    # raised by migration 2 when (user_id, name) can't be made unique;
+    # nothing is deleted for the operator, they rename or merge the extras
+    def __init__(self, duplicates):
+        # duplicates: (user_id, name, "id,id,...") triples
+        shown = "; ".join(f"{name!r} of user {user_id} (ids {ids})" for user_id, name, ids in duplicates[:50])
+        more = ", ..." if len(duplicates) > 50 else ""
+        super().__init__(
+            f"{len(duplicates)} category name(s) are used more than once by the same user; "
+            f"rename or remove the extra categories and restart. {shown}{more}"
+        )
+        self.duplicates = duplicates
+
+def relock(conn, version):
+    # commit a backfill batch and take the migration lock again. Another
+    # worker may have run the whole migration in the gap, in which case
+    # the table is no longer the one this step was converting: stop.
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+        raise MigrationApplied(version)
+
+def unique_category_names(conn, version):
+    # one category per name per user; a database that already holds two
+    # is left as it is and stays on version 1 until they're resolved
+    duplicates = conn.execute(
+        "SELECT user_id, name, GROUP_CONCAT(id) FROM categories "
+        "GROUP BY user_id, name HAVING COUNT(*) > 1 ORDER BY user_id, name"
+    ).fetchall()
+    if duplicates:
+        raise DuplicateCategories(duplicates)
+    conn.execute("DROP INDEX IF EXISTS idx_categories_user_name")
+    conn.execute("CREATE UNIQUE INDEX idx_categories_user_name ON categories (user_id, name)")
+
+def expense_category_ids(conn, version):
+    # expenses.category held the category name as free text on every row;
+    # replace it with a category_id foreign key. The backfill walks the
+    # table in id ranges and commits each one, so other workers' writes
+    # are never held up for long while it runs. Every step up to the
+    # final one is safe to repeat, so a worker that takes the lock in
+    # between can carry the migration on.
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(expenses)")}
+    if "category_id" not in columns:
+        conn.execute("ALTER TABLE expenses ADD COLUMN category_id INTEGER REFERENCES categories(id)")
+    if "category" in columns:
+        # names that were only ever typed on an expense become categories
+        conn.execute("""
+            INSERT INTO categories (name, user_id)
+            SELECT DISTINCT category, user_id FROM expenses e
+            WHERE NOT EXISTS (
+                SELECT 1 FROM categories c WHERE c.user_id = e.user_id AND c.name = e.category)
+        """)
+        fill = """
+            UPDATE expenses SET category_id = (
+                SELECT c.id FROM categories c
+                WHERE c.user_id = expenses.user_id AND c.name = expenses.category)
+            WHERE category_id IS NULL
+        """
+        last_id = conn.execute("SELECT MAX(id) FROM expenses").fetchone()[0] or 0
+        for start in range(0, last_id, BACKFILL_BATCH_SIZE):
+            conn.execute(fill + " AND id > ? AND id <= ?", (start, start + BACKFILL_BATCH_SIZE))
+            relock(conn, version)
+        conn.execute(fill)      # rows added meanwhile
+        conn.execute("DROP INDEX IF EXISTS idx_expenses_user_category")
+        conn.execute("ALTER TABLE expenses DROP COLUMN category")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_expenses_user_category_id ON expenses (user_id, category_id, amount)"
+    )
+    # totals were keyed by name; setup() rebuilds them by category_id
+    conn.execute("DROP TABLE IF EXISTS expense_totals")
+    conn.execute("""
+        CREATE TABLE expense_totals (
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, category_id)
+        )
+    """)
+
+def typed_expense_dates(conn, version):
+    # expenses.date was free text; move it into a DATE column holding
+    # YYYY-MM-DD, the form SQLite's date functions and range scans expect.
+    # Nothing is written unless every stored date parses.
+    columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(expenses)")}
+    if columns.get("date") == "DATE":
+        return
+    bad = [i for i, value in conn.execute("SELECT id, date FROM expenses") if parse_date(value) is None]
+    if bad:
+        raise UnparseableDates(bad)
+    if "date_typed" not in columns:
+        conn.execute("ALTER TABLE expenses ADD COLUMN date_typed DATE")
+
+    def fill(rows):
+        parsed = [(parse_date(value), i) for i, value in rows]
+        bad = [i for value, i in parsed if value is None]
+        if bad:
+            raise UnparseableDates(bad)
+        conn.executemany(
+            "UPDATE expenses SET date_typed = ? WHERE id = ?",
+            [(value.isoformat(), i) for value, i in parsed]
+        )
+
+    last_id = conn.execute("SELECT MAX(id) FROM expenses").fetchone()[0] or 0
+    for start in range(0, last_id, BACKFILL_BATCH_SIZE):
+        fill(conn.execute(
+            "SELECT id, date FROM expenses WHERE id > ? AND id <= ? AND date_typed IS NULL",
+            (start, start + BACKFILL_BATCH_SIZE)
+        ).fetchall())
+        relock(conn, version)
+    fill(conn.execute("SELECT id, date FROM expenses WHERE date_typed IS NULL").fetchall())
+    conn.execute("DROP INDEX IF EXISTS idx_expenses_user_date")
+    conn.execute("ALTER TABLE expenses DROP COLUMN date")
+    conn.execute("ALTER TABLE expenses RENAME COLUMN date_typed TO date")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_id, date, id)")
+
+# ─── Row Layouts ──────────────────────────────────────────────────
+
+EXPENSE_LAYOUT = RowLayout("id", "title", "amount", "category", "date")
 
 # ─── Database Manager ─────────────────────────────────────────────
 
 class DatabaseManager:
     def __init__(self, db_name="expense_tracker.db"):
         self.db_name = db_name
+        self.pool = ConnectionPool(db_name)
         self.setup()
 
+    def connect(self):
+        return self.pool.connection()
+
     def setup(self):
-        with sqlite3.connect(self.db_name) as conn:
+        # a new database gets the current schema and is stamped with the last
+        # migration; one from before a migration keeps its tables, and
+        # migrate() brings them up to date
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")         # one worker creates it
+            fresh = not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expenses'"
+            ).fetchone()
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -33,17 +244,85 @@ class DatabaseManager:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     title TEXT NOT NULL,
                     amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    date TEXT NOT NULL,
+                    category_id INTEGER NOT NULL REFERENCES categories(id),
+                    date DATE NOT NULL,
                     user_id INTEGER NOT NULL,
                     FOREIGN KEY (user_id) REFERENCES users(id)
                 )
             """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS expense_totals (
+                    user_id INTEGER NOT NULL,
+                    category_id INTEGER NOT NULL,
+                    total REAL NOT NULL DEFAULT 0,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, category_id)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS collection_versions (
+                    user_id INTEGER NOT NULL,
+                    resource TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, resource)
+                )
+            """)
+            if fresh:
+                for statement in self.INDEXES:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {self.MIGRATIONS[-1][0]}")
             conn.commit()
+        self.migrate()
+        # databases created before expense_totals existed need one full build
+        with self.connect() as conn:
+            unbuilt = conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM expenses) AND NOT EXISTS (SELECT 1 FROM expense_totals)"
+            ).fetchone()[0]
+        if unbuilt:
+            self.rebuild_summary()
+
+    # the indexes the migrations below end with
+    INDEXES = [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_id, date, id)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_user_category_id ON expenses (user_id, category_id, amount)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_categories_user_name ON categories (user_id, name)",
+    ]
+
+    # ── Migrations ─────────────────────────────────────────────────
+    # schema changes to databases created before them, applied once each
+    # and in order; PRAGMA user_version records the last version applied
+    MIGRATIONS = [
+        (1, [
+            "CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_id, date, id)",
+            "CREATE INDEX IF NOT EXISTS idx_expenses_user_category ON expenses (user_id, category, amount)",
+            "CREATE INDEX IF NOT EXISTS idx_categories_user_name ON categories (user_id, name)",
+        ]),
+        (2, [unique_category_names]),
+        (3, [expense_category_ids]),
+        (4, [typed_expense_dates]),
+    ]
+
+    def migrate(self):
+        for version, steps in self.MIGRATIONS:
+            with self.connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")     # one migrating process at a time
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    continue
+                try:
+                    for step in steps:
+                        if callable(step):
+                            step(conn, version)
+                        else:
+                            conn.execute(step)
+                except MigrationApplied:
+                    conn.rollback()
+                    continue
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
 
     # ── Users ──────────────────────────────────────────────────────
     def add_user(self, username, hashed_password):
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connect() as conn:
             conn.execute(
                 "INSERT INTO users (username, password) VALUES (?, ?)",
                 (username, hashed_password)
@@ -51,70 +330,201 @@ class DatabaseManager:
             conn.commit()
 
     def get_user(self, username):
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connect() as conn:
             cursor = conn.execute(
                 "SELECT * FROM users WHERE username = ?", (username,)
             )
             return cursor.fetchone()
 
     # ── Categories ─────────────────────────────────────────────────
+    # reads come from category_cache; writes update it once they commit
     def add_category(self, name, user_id):
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "INSERT INTO categories (name, user_id) VALUES (?, ?)",
-                (name, user_id)
-            )
+        with self.connect() as conn:
+            try:
+                cursor = conn.execute(
+                    "INSERT INTO categories (name, user_id) VALUES (?, ?)",
+                    (name, user_id)
+                )
+            except sqlite3.IntegrityError:      # (user_id, name) is unique
+                conn.rollback()
+                return False
+            self._bump_versions(conn, user_id, "categories")
             conn.commit()
-
-    def get_categories(self, user_id):
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute(
-                "SELECT * FROM categories WHERE user_id = ?", (user_id,)
-            )
-            rows = cursor.fetchall()
-            return [{"id": r[0], "name": r[1]} for r in rows]
+        category_cache.added(user_id, cursor.lastrowid, name)
+        return True
+
+    def category_map(self, user_id, collection=None):
+        # {category id: name} for the user; collection: the categories version
+        # the caller read, when the result must be at least that new
+        categories = category_cache.get(user_id, collection)
+        if categories is None:
+            version = category_cache.version()
+            with self.connect() as conn:
+                rows = conn.execute(
+                    "SELECT id, name FROM categories WHERE user_id = ?", (user_id,)
+                ).fetchall()
+            categories = category_cache.fill(user_id, rows, version, collection)
+        return categories
+
+    def get_categories(self, user_id, collection=None):
+        return [{"id": i, "name": n} for i, n in self.category_map(user_id, collection).items()]
+
+    def category_ids(self, user_id):
+        # {name: category id}
+        return {name: i for i, name in self.category_map(user_id).items()}
+
+    def has_category(self, name, user_id):
+        return name in self.category_map(user_id).values()
 
     def delete_category(self, name, user_id):
-        with sqlite3.connect(self.db_name) as conn:
+        # refuses (returns False) while expenses still point at the category
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            in_use = conn.execute(
+                """SELECT 1 FROM categories c JOIN expenses e
+                   ON e.user_id = c.user_id AND e.category_id = c.id
+                   WHERE c.user_id = ? AND c.name = ? LIMIT 1""",
+                (user_id, name)
+            ).fetchone()
+            if in_use:
+                conn.rollback()
+                return False
             conn.execute(
                 "DELETE FROM categories WHERE name = ? AND user_id = ?",
                 (name, user_id)
             )
+            self._bump_versions(conn, user_id, "categories")
             conn.commit()
+        category_cache.removed(user_id, name)
+        return True
 
     def update_category(self, old_name, new_name, user_id):   # ✅ added missing method
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "UPDATE categories SET name = ? WHERE name = ? AND user_id = ?",
-                (new_name, old_name, user_id)
-            )
+        # one row: expenses hold the category id and read the name by join
+        with self.connect() as conn:
+            try:
+                conn.execute(
+                    "UPDATE categories SET name = ? WHERE name = ? AND user_id = ?",
+                    (new_name, old_name, user_id)
+                )
+            except sqlite3.IntegrityError:      # new name is already taken
+                conn.rollback()
+                return False
+            self._bump_versions(conn, user_id, "categories")
             conn.commit()
+        category_cache.renamed(user_id, old_name, new_name)
+        return True
+
+    # ── Collection Versions ────────────────────────────────────────
+    # one counter per user and collection ("expenses", "categories"), moved
+    # on by every write in the same transaction; ETags are derived from them
+    def _bump_versions(self, conn, user_id, *resources):
+        conn.executemany(
+            """INSERT INTO collection_versions (user_id, resource, version) VALUES (?, ?, 1)
+               ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1""",
+            [(user_id, resource) for resource in resources]
+        )
+
+    def versions(self, user_id, *resources):
+        # the user's version of each given collection, in order
+        with self.connect() as conn:
+            versions = dict(conn.execute(
+                f"""SELECT resource, version FROM collection_versions
+                    WHERE user_id = ? AND resource IN ({", ".join("?" * len(resources))})""",
+                (user_id, *resources)
+            ).fetchall())
+        return [versions.get(resource, 0) for resource in resources]
+
+    def etag(self, user_id, *resources):
+        # weak ETag over the user's versions of the given collections
+        return weak_etag(user_id, *self.versions(user_id, *resources))
 
     # ── Expenses ───────────────────────────────────────────────────
-    def add_expense(self, title, amount, category, date, user_id):
-        with sqlite3.connect(self.db_name) as conn:
+    def _apply_total(self, conn, user_id, category_id, amount, count):
+        # keep expense_totals in step with a write, inside the caller's transaction
+        conn.execute(
+            """INSERT INTO expense_totals (user_id, category_id, total, count) VALUES (?, ?, ?, ?)
+               ON CONFLICT (user_id, category_id) DO UPDATE
+               SET total = total + excluded.total, count = count + excluded.count""",
+            (user_id, category_id, amount, count)
+        )
+        if count < 0:
+            conn.execute(
+                "DELETE FROM expense_totals WHERE user_id = ? AND category_id = ? AND count <= 0",
+                (user_id, category_id)
+            )
+
+    def add_expense(self, title, amount, category_id, date, user_id):
+        with self.connect() as conn:
             conn.execute(
-                "INSERT INTO expenses (title, amount, category, date, user_id) VALUES (?,?,?,?,?)",
-                (title, amount, category, date, user_id)
+                "INSERT INTO expenses (title, amount, category_id, date, user_id) VALUES (?,?,?,?,?)",
+                (title, amount, category_id, str(date), user_id)
+            )
+            self._apply_total(conn, user_id, category_id, amount, 1)
+            self._bump_versions(conn, user_id, "expenses")
+            conn.commit()
+
+    def add_expenses(self, expenses, user_id, category_ids):
+        # a batch of validated ExpenseInput rows in one transaction;
+        # category_ids maps each row's category name to its id
+        with self.connect() as conn:
+            conn.executemany(
+                "INSERT INTO expenses (title, amount, category_id, date, user_id) VALUES (?,?,?,?,?)",
+                [(e.title, e.amount, category_ids[e.category], str(e.date), user_id) for e in expenses]
             )
+            for category, (total, count) in category_totals(expenses).items():
+                self._apply_total(conn, user_id, category_ids[category], total, count)
+            self._bump_versions(conn, user_id, "expenses")
             conn.commit()
+        return len(expenses)
+
+    # the category name is read through the join, never copied onto expenses
+    EXPENSE_SELECT_SQL = """
+        SELECT e.id, e.title, e.amount, c.name, e.date
+        FROM expenses e JOIN categories c ON c.id = e.category_id
+    """
+    EXPENSES_PAGE_SQL = EXPENSE_SELECT_SQL + """
+        WHERE e.user_id = ? AND e.date >= ? AND e.date <= ? AND (e.date, e.id) > (?, ?)
+        ORDER BY e.date, e.id
+    """
+
+    @staticmethod
+    def _page_params(user_id, after, date_from, date_to):
+        # EXPENSES_PAGE_SQL parameters; open ends of the range stay open
+        after_date, after_id = after or ("", 0)
+        return (user_id, str(date_from or datetime.date.min), str(date_to or datetime.date.max),
+                str(after_date), after_id)
+
+    def get_expenses(self, user_id, limit, after=None, date_from=None, date_to=None):
+        # keyset page ordered by (date, id); "after" is the last key seen,
+        # date_from / date_to (inclusive) narrow the index range scanned.
+        # Rows are tuples in EXPENSE_LAYOUT order.
+        with self.connect() as conn:
+            cursor = conn.execute(
+                self.EXPENSES_PAGE_SQL + " LIMIT ?",
+                (*self._page_params(user_id, after, date_from, date_to), limit)
+            )
+            return cursor.fetchall()
 
-    def get_expenses(self, user_id):
-        with sqlite3.connect(self.db_name) as conn:
+    def iter_expenses(self, user_id, after=None, date_from=None, date_to=None):
+        # the response body is pulled from the threadpool one chunk at a time,
+        # so stream on a dedicated connection instead of a per-thread one
+        conn = self.pool.open()
+        try:
             cursor = conn.execute(
-                "SELECT * FROM expenses WHERE user_id = ?", (user_id,)
+                self.EXPENSES_PAGE_SQL, self._page_params(user_id, after, date_from, date_to)
             )
-            rows = cursor.fetchall()
-            return [
-                {"id": r[0], "title": r[1], "amount": r[2],
-                 "category": r[3], "date": r[4]}
-                for r in rows
-            ]
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                yield from EXPENSE_LAYOUT.objects(rows)
+        finally:
+            conn.close()
 
     def get_expense(self, expense_id, user_id):               # ✅ added direct lookup
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connect() as conn:
             cursor = conn.execute(
-                "SELECT * FROM expenses WHERE id = ? AND user_id = ?",
+                self.EXPENSE_SELECT_SQL + " WHERE e.id = ? AND e.user_id = ?",
                 (expense_id, user_id)
             )
             row = cursor.fetchone()
@@ -124,65 +534,135 @@ class DatabaseManager:
             return None
 
     def get_expenses_by_category(self, category, user_id):    # ✅ direct DB query
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connect() as conn:
             cursor = conn.execute(
-                "SELECT * FROM expenses WHERE category = ? AND user_id = ?",
-                (category, user_id)
+                self.EXPENSE_SELECT_SQL + " WHERE c.user_id = ? AND c.name = ? AND e.user_id = ?",
+                (user_id, category, user_id)
             )
-            rows = cursor.fetchall()
-            return [
-                {"id": r[0], "title": r[1], "amount": r[2],
-                 "category": r[3], "date": r[4]}
-                for r in rows
-            ]
-
-    def update_expense(self, expense_id, title, amount, category, date, user_id):
-        with sqlite3.connect(self.db_name) as conn:
+            return cursor.fetchall()                    # tuples in EXPENSE_LAYOUT order
+
+    def update_expense(self, expense_id, title, amount, category_id, date, user_id):
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")     # old values must not change under us
+            old = conn.execute(
+                "SELECT amount, category_id FROM expenses WHERE id = ? AND user_id = ?",
+                (expense_id, user_id)
+            ).fetchone()
+            if not old:
+                return
             conn.execute(
-                "UPDATE expenses SET title=?, amount=?, category=?, date=? WHERE id=? AND user_id=?",
-                (title, amount, category, date, expense_id, user_id)
+                "UPDATE expenses SET title=?, amount=?, category_id=?, date=? WHERE id=? AND user_id=?",
+                (title, amount, category_id, str(date), expense_id, user_id)
             )
+            self._apply_total(conn, user_id, old[1], -old[0], -1)
+            self._apply_total(conn, user_id, category_id, amount, 1)
+            self._bump_versions(conn, user_id, "expenses")
             conn.commit()
 
     def delete_expense(self, expense_id, user_id):
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            old = conn.execute(
+                "SELECT amount, category_id FROM expenses WHERE id = ? AND user_id = ?",
+                (expense_id, user_id)
+            ).fetchone()
+            if not old:
+                return
             conn.execute(
                 "DELETE FROM expenses WHERE id = ? AND user_id = ?",
                 (expense_id, user_id)
             )
+            self._apply_total(conn, user_id, old[1], -old[0], -1)
+            self._bump_versions(conn, user_id, "expenses")
             conn.commit()
 
     def get_summary(self, user_id):                           # ✅ summary method
-        with sqlite3.connect(self.db_name) as conn:
-            total = conn.execute(
-                "SELECT SUM(amount) FROM expenses WHERE user_id = ?",
-                (user_id,)
-            ).fetchone()[0] or 0
-
+        # served from expense_totals: one row per category, no scan of expenses
+        with self.connect() as conn:
             rows = conn.execute(
-                "SELECT category, SUM(amount) FROM expenses WHERE user_id = ? GROUP BY category",
+                """SELECT c.name, t.total FROM expense_totals t
+                   JOIN categories c ON c.id = t.category_id WHERE t.user_id = ?""",
                 (user_id,)
             ).fetchall()
 
             return {
-                "total_spent": round(total, 2),
+                "total_spent": round(sum(row[1] for row in rows), 2),
                 "by_category": {row[0]: round(row[1], 2) for row in rows}
             }
 
+    PERIODS = {
+        "month": "strftime('%Y-%m', e.date)",
+        "week": "date(e.date, 'weekday 0', '-6 days')",     # the Monday that starts it
+    }
+
+    def get_summary_by_period(self, user_id, granularity, date_from=None, date_to=None):
+        # bucketed and summed by SQLite over one (user_id, date) index range
+        with self.connect() as conn:
+            rows = conn.execute(f"""
+                SELECT {self.PERIODS[granularity]} AS period, c.name, SUM(e.amount)
+                FROM expenses e JOIN categories c ON c.id = e.category_id
+                WHERE e.user_id = ? AND e.date >= ? AND e.date <= ?
+                GROUP BY period, e.category_id
+                ORDER BY period, e.category_id
+            """, (user_id, str(date_from or datetime.date.min), str(date_to or datetime.date.max))
+            ).fetchall()
+        return {"granularity": granularity, "periods": period_totals(rows)}
+
+    # ── Summary Maintenance ────────────────────────────────────────
+    def check_summary(self):
+        # (user_id, category_id, stored total, actual total, stored count, actual count)
+        # for every expense_totals row that disagrees with the expenses table
+        with self.connect() as conn:
+            return conn.execute("""
+                SELECT user_id, category_id, SUM(total), SUM(actual), SUM(count), SUM(actual_count)
+                FROM (
+                    SELECT user_id, category_id, total, 0 AS actual, count, 0 AS actual_count
+                    FROM expense_totals
+                    UNION ALL
+                    SELECT user_id, category_id, 0, SUM(amount), 0, COUNT(*)
+                    FROM expenses GROUP BY user_id, category_id
+                )
+                GROUP BY user_id, category_id
+                HAVING ABS(SUM(total) - SUM(actual)) > 0.005 OR SUM(count) != SUM(actual_count)
+            """).fetchall()
+
+    def rebuild_summary(self):
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM expense_totals")
+            conn.execute("""
+                INSERT INTO expense_totals (user_id, category_id, total, count)
+                SELECT user_id, category_id, SUM(amount), COUNT(*)
+                FROM expenses GROUP BY user_id, category_id
+            """)
+            conn.commit()
+
 # ─── Auth Setup ───────────────────────────────────────────────────
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")  # ✅ correct URL
 
 app = FastAPI()
-db = DatabaseManager()
+db = DatabaseManager(os.getenv("EXPENSE_DB", "expense_tracker.db"))
+
+@app.exception_handler(PoolBusy)
+def hash_pool_busy(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many logins in progress, retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 def get_current_user(token: str = Depends(oauth2_scheme)):   # ✅ simplified
-    username = verify_token(token)
+    user = token_cache.get(token)       # no decode or lookup for a known token
+    if user:
+        return user
+    username, expires = decode_token(token) or (None, None)
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token")
     user = db.get_user(username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    token_cache.put(token, username, user, expires)
     return user
 
 # ─── Input Models ─────────────────────────────────────────────────
@@ -198,60 +678,112 @@ class ExpenseInput(BaseModel):
     title: str
     amount: float
     category: str
-    date: str
+    date: datetime.date
 
 class ExpenseUpdate(BaseModel):
     title: str = None
     amount: float = None
     category: str = None
-    date: str = None
+    date: datetime.date = None
 
 # ─── Auth Endpoints ───────────────────────────────────────────────
 
+# bcrypt runs in the hashing pool and sqlite calls in the threadpool,
+# so these two never block the event loop or hog a request thread
+
 @app.post("/auth/register")
-def register(user: UserInput):
-    if db.get_user(user.username):
+async def register(user: UserInput):
+    if await run_in_threadpool(db.get_user, user.username):
         raise HTTPException(status_code=400, detail="Username already exists")
-    db.add_user(user.username, hash_password(user.password))
+    hashed_password = await hash_password_async(user.password)
+    await run_in_threadpool(db.add_user, user.username, hashed_password)
     return {"message": f"User '{user.username}' registered successfully!"}
 
 @app.post("/auth/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = db.get_user(form_data.username)
-    if not user or not verify_password(form_data.password, user[2]):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await run_in_threadpool(db.get_user, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user[2]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     return {"access_token": create_token(user[1]), "token_type": "bearer"}
 
+# ─── Metrics Endpoint ─────────────────────────────────────────────
+
+@app.get("/metrics")
+def metrics():
+    return {"password_hashing": hash_pool.stats()}
+
 # ─── Category Endpoints ───────────────────────────────────────────
 
 @app.get("/categories")
-def get_categories(current_user: tuple = Depends(get_current_user)):
-    return db.get_categories(current_user[0])
+def get_categories(request: Request, response: Response, current_user: tuple = Depends(get_current_user)):
+    version, = db.versions(current_user[0], "categories")
+    etag = weak_etag(current_user[0], version)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers.update(cache_headers(etag))
+    # the body must be at least as new as the version behind the ETag
+    return db.get_categories(current_user[0], version)
 
 @app.post("/categories")
 def create_category(category: CategoryInput, current_user: tuple = Depends(get_current_user)):
-    db.add_category(category.name, current_user[0])
+    if not db.add_category(category.name, current_user[0]):
+        raise HTTPException(status_code=400, detail="Category already exists")
     return {"message": f"Category '{category.name}' created successfully!"}
 
 @app.put("/categories/{name}")
 def update_category(name: str, category: CategoryInput, current_user: tuple = Depends(get_current_user)):
-    db.update_category(name, category.name, current_user[0])
+    if not db.has_category(name, current_user[0]):
+        raise HTTPException(status_code=404, detail="Category not found")
+    if not db.update_category(name, category.name, current_user[0]):
+        raise HTTPException(status_code=400, detail="Category already exists")
     return {"message": f"Category updated successfully!"}
 
 @app.delete("/categories/{name}")
 def delete_category(name: str, current_user: tuple = Depends(get_current_user)):
-    db.delete_category(name, current_user[0])
+    if not db.has_category(name, current_user[0]):
+        raise HTTPException(status_code=404, detail="Category not found")
+    if not db.delete_category(name, current_user[0]):
+        raise HTTPException(status_code=400, detail="Category still has expenses")
     return {"message": f"Category '{name}' deleted successfully!"}
 
 # ─── Expense Endpoints ────────────────────────────────────────────
 
 @app.get("/expenses")
-def get_expenses(current_user: tuple = Depends(get_current_user)):
-    return db.get_expenses(current_user[0])
+def get_expenses(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str = None,
+    stream: bool = False,
+    date_from: datetime.date = Query(None, alias="from"),
+    date_to: datetime.date = Query(None, alias="to"),
+    current_user: tuple = Depends(get_current_user)
+):
+    cursor = None
+    if after:
+        cursor = decode_cursor(after)
+        if cursor is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    # expenses show their category's name, so a rename changes them too
+    etag = db.etag(current_user[0], "expenses", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    if stream:                                  # every remaining row as NDJSON
+        rows = db.iter_expenses(current_user[0], cursor, date_from, date_to)
+        return StreamingResponse(
+            ndjson_lines(rows), media_type="application/x-ndjson", headers=cache_headers(etag)
+        )
+    headers = cache_headers(etag)
+    page = db.get_expenses(current_user[0], limit + 1, cursor, date_from, date_to)
+    if len(page) > limit:                       # one extra row means there's more
+        page = page[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(page[-1][4], page[-1][0])
+    return EXPENSE_LAYOUT.response(page, headers=headers)
 
 @app.get("/expenses/category/{category_name}")
 def get_expenses_by_category(category_name: str, current_user: tuple = Depends(get_current_user)):
-    return db.get_expenses_by_category(category_name, current_user[0])
+    return EXPENSE_LAYOUT.response(db.get_expenses_by_category(category_name, current_user[0]))
 
 @app.get("/expenses/{expense_id}")
 def get_expense(expense_id: int, current_user: tuple = Depends(get_current_user)):
@@ -262,19 +794,36 @@ def get_expense(expense_id: int, current_user: tuple = Depends(get_current_user)
 
 @app.post("/expenses")
 def create_expense(expense: ExpenseInput, current_user: tuple = Depends(get_current_user)):
-    db.add_expense(expense.title, expense.amount, expense.category, expense.date, current_user[0])
+    category_id = db.category_ids(current_user[0]).get(expense.category)
+    if category_id is None:
+        raise HTTPException(status_code=400, detail="Unknown category")
+    db.add_expense(expense.title, expense.amount, category_id, expense.date, current_user[0])
     return {"message": f"Expense '{expense.title}' created successfully!"}
 
+@app.post("/expenses/bulk")
+async def bulk_create_expenses(request: Request, current_user: tuple = Depends(get_current_user)):
+    # streamed JSON array, NDJSON or CSV upload, inserted in batches
+    if not detect_format(request.headers.get("content-type")):
+        raise HTTPException(status_code=415, detail="Send application/json, application/x-ndjson or text/csv")
+    categories = await run_in_threadpool(db.category_ids, current_user[0])
+    return await import_expenses(
+        request, ExpenseInput, lambda expenses: db.add_expenses(expenses, current_user[0], categories),
+        check=lambda expense: None if expense.category in categories else "unknown category"
+    )
+
 @app.put("/expenses/{expense_id}")
 def update_expense(expense_id: int, expense: ExpenseUpdate, current_user: tuple = Depends(get_current_user)):
     existing = db.get_expense(expense_id, current_user[0])
     if not existing:
         raise HTTPException(status_code=404, detail="Expense not found")
+    category_id = db.category_ids(current_user[0]).get(expense.category or existing["category"])
+    if category_id is None:
+        raise HTTPException(status_code=400, detail="Unknown category")
     db.update_expense(
         expense_id,
         expense.title or existing["title"],
         expense.amount or existing["amount"],
-        expense.category or existing["category"],
+        category_id,
         expense.date or existing["date"],
         current_user[0]
     )
@@ -291,5 +840,19 @@ def delete_expense(expense_id: int, current_user: tuple = Depends(get_current_us
 # ─── Summary Endpoint ─────────────────────────────────────────────
 
 @app.get("/summary")
-def get_summary(current_user: tuple = Depends(get_current_user)):
+def get_summary(
+    request: Request,
+    response: Response,
+    granularity: Literal["month", "week"] = None,
+    date_from: datetime.date = Query(None, alias="from"),
+    date_to: datetime.date = Query(None, alias="to"),
+    current_user: tuple = Depends(get_current_user)
+):
+    etag = db.etag(current_user[0], "expenses", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers.update(cache_headers(etag))
+    if granularity:                             # totals per month / week
+        return db.get_summary_by_period(current_user[0], granularity, date_from, date_to)
     return db.get_summary(current_user[0])
\ No newline at end of file
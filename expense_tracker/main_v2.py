@@ -1,10 +1,31 @@
-from fastapi import FastAPI, HTTPException, Depends
+from typing import Literal, NamedTuple
+import datetime
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database import SessionLocal, init_db, User, Category, Expense
-from auth import create_token, verify_token, hash_password, verify_password
+from sqlalchemy import event, func, insert, inspect, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from database import (
+    SessionLocal, init_db, User, Category, Expense, ExpenseTotal, ExpenseDaily, ExpenseMonthly,
+    apply_expense_changes, bump_versions, versions_query,
+    database_metrics, date_period,
+)
+from auth import (
+    create_token, decode_token, hash_password_async, verify_password_async,
+    token_cache, hash_pool, PoolBusy,
+)
+from bulk_import import detect_format, import_expenses
+from category_cache import category_cache
+from dates import period_totals
+from http_cache import weak_etag, not_modified, cache_headers
+from fast_json import RowLayout
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, STREAM_BATCH_SIZE, NEXT_CURSOR_HEADER,
+    encode_cursor, decode_cursor, ndjson_lines,
+)
 
 # ─── Init Database ────────────────────────────────────────────────
 init_db()
@@ -12,6 +33,14 @@ init_db()
 # ─── FastAPI Setup ────────────────────────────────────────────────
 app = FastAPI()
 
+@app.exception_handler(PoolBusy)
+def hash_pool_busy(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many logins in progress, retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # ─── Database Session Dependency ─────────────────────────────────
 def get_db():
     db = SessionLocal()
@@ -23,18 +52,37 @@ def get_db():
 # ─── Auth Setup ───────────────────────────────────────────────────
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+class CurrentUser(NamedTuple):
+    # what routes need of the caller; safe to cache across sessions,
+    # unlike a User instance bound to the session that loaded it
+    id: int
+    username: str
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ):
-    username = verify_token(token)
+    user = token_cache.get(token)       # no decode or lookup for a known token
+    if user:
+        return user
+    username, expires = decode_token(token) or (None, None)
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
+    row = db.query(User.id, User.username).filter(User.username == username).first()
+    if not row:
         raise HTTPException(status_code=404, detail="User not found")
+    user = CurrentUser(row.id, row.username)
+    token_cache.put(token, username, user, expires)
     return user
 
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def forget_user_tokens(mapper, connection, target):
+    # drop cached tokens for the user's old and current username
+    history = inspect(target).attrs.username.history
+    for username in {target.username, *history.deleted}:
+        token_cache.invalidate_user(username)
+
 # ─── Input Models ─────────────────────────────────────────────────
 class UserInput(BaseModel):
     username: str
@@ -47,13 +95,13 @@ class ExpenseInput(BaseModel):
     title: str
     amount: float
     category: str
-    date: str
+    date: datetime.date
 
 class ExpenseUpdate(BaseModel):
     title: str = None
     amount: float = None
     category: str = None
-    date: str = None
+    date: datetime.date = None
 
 # ─── Auth Endpoints ───────────────────────────────────────────────
 
@@ -61,49 +109,106 @@ class ExpenseUpdate(BaseModel):
 def home():
     return {"message": "Expense Tracker API v2 — SQLAlchemy + PostgreSQL!"}
 
+# bcrypt runs in the hashing pool and queries in the threadpool,
+# so these two never block the event loop or hog a request thread
+
+def find_user(db, username):
+    return db.query(User).filter(User.username == username).first()
+
+def add_user(db, username, hashed_password):
+    db.add(User(username=username, password=hashed_password))
+    db.commit()
+
 @app.post("/auth/register")
-def register(user: UserInput, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.username == user.username).first()
+async def register(user: UserInput, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(find_user, db, user.username)
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
-    new_user = User(username=user.username, password=hash_password(user.password))
-    db.add(new_user)
-    db.commit()
+    hashed_password = await hash_password_async(user.password)
+    await run_in_threadpool(add_user, db, user.username, hashed_password)
     return {"message": f"User '{user.username}' registered successfully!"}
 
 @app.post("/auth/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user, db, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     return {"access_token": create_token(user.username), "token_type": "bearer"}
 
+# ─── Metrics Endpoint ─────────────────────────────────────────────
+
+@app.get("/metrics")
+def metrics():
+    return {"password_hashing": hash_pool.stats(), "database": database_metrics()}
+
+# ─── Conditional Requests ─────────────────────────────────────────
+
+def versions_etag(user_id, resources, rows):
+    # rows: (resource, version) as read by versions_query
+    versions = dict(rows)
+    return weak_etag(user_id, *(versions.get(resource, 0) for resource in resources))
+
+def collection_etag(db, user_id, *resources):
+    return versions_etag(user_id, resources, db.execute(versions_query(user_id, resources)).all())
+
 # ─── Category Endpoints ───────────────────────────────────────────
 
+def category_map(db, user_id, collection=None):
+    # {category id: name}, from category_cache once it's warm; category
+    # writes below update the cache after they commit. collection: the
+    # categories version the caller read, when the result must match it
+    categories = category_cache.get(user_id, collection)
+    if categories is None:
+        version = category_cache.version()
+        rows = db.execute(
+            select(Category.id, Category.name).where(Category.user_id == user_id)
+        ).all()
+        categories = category_cache.fill(user_id, rows, version, collection)
+    return categories
+
+def category_ids(db, user_id):
+    # {name: category id}
+    return {name: i for i, name in category_map(db, user_id).items()}
+
 @app.get("/categories")
 def get_categories(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    categories = db.query(Category).filter(Category.user_id == current_user.id).all()
-    return [{"id": c.id, "name": c.name} for c in categories]
+    rows = db.execute(versions_query(current_user.id, ("categories",))).all()
+    etag = versions_etag(current_user.id, ("categories",), rows)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers.update(cache_headers(etag))
+    # the body must be at least as new as the version behind the ETag
+    categories = category_map(db, current_user.id, dict(rows).get("categories", 0))
+    return [{"id": i, "name": n} for i, n in categories.items()]
 
 @app.post("/categories")
 def create_category(
     category: CategoryInput,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     new_cat = Category(name=category.name, user_id=current_user.id)
     db.add(new_cat)
-    db.commit()
+    try:
+        bump_versions(db, current_user.id, "categories")    # flushes new_cat first
+        db.commit()
+    except IntegrityError:      # (user_id, name) is unique
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Category already exists")
+    category_cache.added(current_user.id, new_cat.id, new_cat.name)
     return {"message": f"Category '{category.name}' created successfully!"}
 
 @app.put("/categories/{name}")
 def update_category(
     name: str,
     category: CategoryInput,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     cat = db.query(Category).filter(
@@ -113,13 +218,19 @@ def update_category(
     if not cat:
         raise HTTPException(status_code=404, detail="Category not found")
     cat.name = category.name
-    db.commit()
+    try:
+        bump_versions(db, current_user.id, "categories")
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Category already exists")
+    category_cache.renamed(current_user.id, name, category.name)
     return {"message": "Category updated successfully!"}
 
 @app.delete("/categories/{name}")
 def delete_category(
     name: str,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     cat = db.query(Category).filter(
@@ -128,50 +239,111 @@ def delete_category(
     ).first()
     if not cat:
         raise HTTPException(status_code=404, detail="Category not found")
+    in_use = db.query(Expense.id).filter(
+        Expense.user_id == current_user.id,
+        Expense.category_id == cat.id
+    ).first()
+    if in_use:
+        raise HTTPException(status_code=400, detail="Category still has expenses")
     db.delete(cat)
+    bump_versions(db, current_user.id, "categories")
     db.commit()
+    category_cache.removed(current_user.id, name)
     return {"message": f"Category '{name}' deleted successfully!"}
 
 # ─── Expense Endpoints ────────────────────────────────────────────
 
+def expense_rows(user_id):
+    # expenses store category_id; the name comes from categories, so a
+    # rename shows up everywhere at once
+    return select(
+        Expense.id, Expense.title, Expense.amount, Category.name.label("category"), Expense.date
+    ).join(Category, Category.id == Expense.category_id).where(Expense.user_id == user_id)
+
+# list responses are encoded straight from expense_rows() rows with orjson
+EXPENSE_LAYOUT = RowLayout(*expense_rows(None).selected_columns.keys())
+
+def date_range(query, date_from=None, date_to=None):
+    # inclusive bounds, scanned as one range of ix_expenses_user_date
+    if date_from:
+        query = query.where(Expense.date >= date_from)
+    if date_to:
+        query = query.where(Expense.date <= date_to)
+    return query
+
+def expenses_page_query(user_id, after=None, date_from=None, date_to=None):
+    # keyset order on (date, id); "after" is the last key the client saw
+    query = date_range(expense_rows(user_id), date_from, date_to)
+    if after:
+        query = query.where(tuple_(Expense.date, Expense.id) > after)
+    return query.order_by(Expense.date, Expense.id)
+
+def stream_expenses(user_id, after=None, date_from=None, date_to=None):
+    # own session: the response body outlives the request's get_db session
+    db = SessionLocal()
+    try:
+        query = expenses_page_query(user_id, after, date_from, date_to).execution_options(
+            yield_per=STREAM_BATCH_SIZE     # server-side cursor, fetched in batches
+        )
+        for rows in db.execute(query).partitions():
+            yield from EXPENSE_LAYOUT.objects(rows)
+    finally:
+        db.close()
+
 @app.get("/expenses")
 def get_expenses(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str = None,
+    stream: bool = False,
+    date_from: datetime.date = Query(None, alias="from"),
+    date_to: datetime.date = Query(None, alias="to"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    expenses = db.query(Expense).filter(Expense.user_id == current_user.id).all()
-    return [
-        {"id": e.id, "title": e.title, "amount": e.amount,
-         "category": e.category, "date": e.date}
-        for e in expenses
-    ]
+    cursor = None
+    if after:
+        cursor = decode_cursor(after)
+        if cursor is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    # expenses show their category's name, so a rename changes them too
+    etag = collection_etag(db, current_user.id, "expenses", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    if stream:
+        rows = stream_expenses(current_user.id, cursor, date_from, date_to)
+        return StreamingResponse(
+            ndjson_lines(rows), media_type="application/x-ndjson", headers=cache_headers(etag)
+        )
+    headers = cache_headers(etag)
+    expenses = db.execute(
+        expenses_page_query(current_user.id, cursor, date_from, date_to).limit(limit + 1)
+    ).all()
+    if len(expenses) > limit:
+        expenses = expenses[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(expenses[-1].date, expenses[-1].id)
+    return EXPENSE_LAYOUT.response(expenses, headers=headers)
 
 @app.get("/expenses/category/{category_name}")
 def get_expenses_by_category(
     category_name: str,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    expenses = db.query(Expense).filter(
-        Expense.user_id == current_user.id,
-        Expense.category == category_name
-    ).all()
-    return [
-        {"id": e.id, "title": e.title, "amount": e.amount,
-         "category": e.category, "date": e.date}
-        for e in expenses
-    ]
+    expenses = db.execute(expense_rows(current_user.id).where(
+        Category.user_id == current_user.id,
+        Category.name == category_name
+    )).all()
+    return EXPENSE_LAYOUT.response(expenses)
 
 @app.get("/expenses/{expense_id}")
 def get_expense(
     expense_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    expense = db.query(Expense).filter(
-        Expense.id == expense_id,
-        Expense.user_id == current_user.id
-    ).first()
+    expense = db.execute(expense_rows(current_user.id).where(Expense.id == expense_id)).first()
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     return {"id": expense.id, "title": expense.title, "amount": expense.amount,
@@ -180,74 +352,184 @@ def get_expense(
 @app.post("/expenses")
 def create_expense(
     expense: ExpenseInput,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    category_id = category_ids(db, current_user.id).get(expense.category)
+    if category_id is None:
+        raise HTTPException(status_code=400, detail="Unknown category")
     new_expense = Expense(
         title=expense.title,
         amount=expense.amount,
-        category=expense.category,
+        category_id=category_id,
         date=expense.date,
         user_id=current_user.id
     )
     db.add(new_expense)
+    apply_expense_changes(db, current_user.id, [(category_id, expense.date, expense.amount, 1)])
     db.commit()
     return {"message": f"Expense '{expense.title}' created successfully!"}
 
+@app.post("/expenses/bulk")
+async def bulk_create_expenses(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # streamed JSON array, NDJSON or CSV upload, inserted in batches
+    if not detect_format(request.headers.get("content-type")):
+        raise HTTPException(status_code=415, detail="Send application/json, application/x-ndjson or text/csv")
+
+    categories = await run_in_threadpool(category_ids, db, current_user.id)
+
+    def insert_rows(expenses):
+        db.execute(insert(Expense), [
+            {"title": e.title, "amount": e.amount, "category_id": categories[e.category],
+             "date": e.date, "user_id": current_user.id}
+            for e in expenses
+        ])
+        apply_expense_changes(db, current_user.id, [
+            (categories[e.category], e.date, e.amount, 1) for e in expenses
+        ])
+        db.commit()
+        return len(expenses)
+
+    return await import_expenses(
+        request, ExpenseInput, insert_rows,
+        check=lambda expense: None if expense.category in categories else "unknown category"
+    )
+
 @app.put("/expenses/{expense_id}")
 def update_expense(
     expense_id: int,
     expense: ExpenseUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     existing = db.query(Expense).filter(
         Expense.id == expense_id,
         Expense.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     if not existing:
         raise HTTPException(status_code=404, detail="Expense not found")
+    if expense.category:
+        category_id = category_ids(db, current_user.id).get(expense.category)
+        if category_id is None:
+            raise HTTPException(status_code=400, detail="Unknown category")
+    removed = (existing.category_id, existing.date, -existing.amount, -1)
 
     if expense.title:    existing.title    = expense.title
     if expense.amount:   existing.amount   = expense.amount
-    if expense.category: existing.category = expense.category
+    if expense.category: existing.category_id = category_id
     if expense.date:     existing.date     = expense.date
 
+    apply_expense_changes(db, current_user.id, [
+        removed, (existing.category_id, existing.date, existing.amount, 1)
+    ])
     db.commit()
     return {"message": "Expense updated successfully!"}
 
 @app.delete("/expenses/{expense_id}")
 def delete_expense(
     expense_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     existing = db.query(Expense).filter(
         Expense.id == expense_id,
         Expense.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     if not existing:
         raise HTTPException(status_code=404, detail="Expense not found")
     db.delete(existing)
+    apply_expense_changes(db, current_user.id, [
+        (existing.category_id, existing.date, -existing.amount, -1)
+    ])
     db.commit()
     return {"message": "Expense deleted successfully!"}
 
 # ─── Summary Endpoint ─────────────────────────────────────────────
 
+def period_summary_query(dialect, user_id, granularity, date_from=None, date_to=None):
+    # (period, category, total) per month or week, bucketed by the database
+    period = date_period(dialect, granularity, Expense.date).label("period")
+    query = select(period, Category.name, func.sum(Expense.amount)).join(
+        Category, Category.id == Expense.category_id
+    ).where(Expense.user_id == user_id)
+    return date_range(query, date_from, date_to).group_by(
+        period, Expense.category_id, Category.name
+    ).order_by(period, Expense.category_id, Category.name)     # as grouped, no second sort
+
 @app.get("/summary")
 def get_summary(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    granularity: Literal["month", "week"] = None,
+    date_from: datetime.date = Query(None, alias="from"),
+    date_to: datetime.date = Query(None, alias="to"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    total = db.query(func.sum(Expense.amount)).filter(
-        Expense.user_id == current_user.id
-    ).scalar() or 0
-
-    breakdown = db.query(Expense.category, func.sum(Expense.amount)).filter(
-        Expense.user_id == current_user.id
-    ).group_by(Expense.category).all()
+    etag = collection_etag(db, current_user.id, "expenses", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers.update(cache_headers(etag))
+    if granularity:                             # totals per month / week
+        rows = db.execute(period_summary_query(
+            db.get_bind().dialect.name, current_user.id, granularity, date_from, date_to
+        )).all()
+        return {"granularity": granularity, "periods": period_totals(rows)}
+    # served from expense_totals: one row per category, no scan of expenses
+    breakdown = db.query(Category.name, ExpenseTotal.total).join(
+        Category, Category.id == ExpenseTotal.category_id
+    ).filter(ExpenseTotal.user_id == current_user.id).all()
 
     return {
-        "total_spent": round(total, 2),
+        "total_spent": round(sum(row[1] for row in breakdown), 2),
         "by_category": {row[0]: round(row[1], 2) for row in breakdown}
-    }
\ No newline at end of file
+    }
+
+# ─── Analytics Endpoints ──────────────────────────────────────────
+
+ROLLUPS = {"day": ExpenseDaily, "month": ExpenseMonthly}
+
+def timeseries_query(user_id, granularity, date_from=None, date_to=None, category_id=None):
+    # one primary-key range of the rollup table, already in period order
+    model = ROLLUPS[granularity]
+    query = select(model.period, model.category_id, model.total).where(model.user_id == user_id)
+    if date_from:
+        query = query.where(model.period >= (date_from if granularity == "day" else date_from.replace(day=1)))
+    if date_to:
+        query = query.where(model.period <= date_to)
+    if category_id is not None:
+        query = query.where(model.category_id == category_id)
+    return query.order_by(model.period)
+
+def timeseries_response(granularity, rows, categories):
+    # category names come from the category cache, not a join
+    label = str if granularity == "day" else (lambda period: period.strftime("%Y-%m"))
+    return {"granularity": granularity, "periods": period_totals(
+        [(label(period), categories.get(category_id), total) for period, category_id, total in rows]
+    )}
+
+@app.get("/analytics/timeseries")
+def get_timeseries(
+    granularity: Literal["day", "month"] = "day",
+    date_from: datetime.date = Query(None, alias="from"),
+    date_to: datetime.date = Query(None, alias="to"),
+    category: str = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # served from the rollups, however many expenses the user has
+    categories = category_map(db, current_user.id)
+    category_id = None
+    if category:
+        category_id = {name: i for i, name in categories.items()}.get(category)
+        if category_id is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+    rows = db.execute(
+        timeseries_query(current_user.id, granularity, date_from, date_to, category_id)
+    ).all()
+    return timeseries_response(granularity, rows, categories)
\ No newline at end of file
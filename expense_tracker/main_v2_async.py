@@ -0,0 +1,423 @@
+from typing import Literal
+import datetime
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from database import (
+    AsyncSessionLocal, User, Category, Expense, ExpenseTotal, apply_expense_changes_async,
+    bump_versions_async, versions_query, database_metrics,
+)
+from auth import (
+    create_token, decode_token, hash_password_async, verify_password_async,
+    token_cache, hash_pool,
+)
+from bulk_import import detect_format, import_expenses
+from category_cache import category_cache
+from dates import period_totals
+from http_cache import not_modified, cache_headers
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, STREAM_BATCH_SIZE, NEXT_CURSOR_HEADER,
+    encode_cursor, decode_cursor, ndjson_lines_async,
+)
+# same schema, input models and queries as the sync app; importing it also
+# runs init_db() and registers the token cache's User listeners
+from main_v2 import (
+    oauth2_scheme, hash_pool_busy, CurrentUser, expense_rows, expenses_page_query, versions_etag,
+    EXPENSE_LAYOUT,
+    period_summary_query, timeseries_query, timeseries_response,
+    UserInput, CategoryInput, ExpenseInput, ExpenseUpdate, PoolBusy,
+)
+
+# ─── FastAPI Setup ────────────────────────────────────────────────
+# Every route is a coroutine on an AsyncSession, so an idle request holds
+# no thread. Selected with DB_ASYNC=1, see asgi.py.
+app = FastAPI()
+app.add_exception_handler(PoolBusy, hash_pool_busy)
+
+# ─── Database Session Dependency ─────────────────────────────────
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db        # closed when the request finishes
+
+# ─── Auth Setup ───────────────────────────────────────────────────
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    user = token_cache.get(token)
+    if user:
+        return user
+    username, expires = decode_token(token) or (None, None)
+    if not username:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    row = (await db.execute(
+        select(User.id, User.username).where(User.username == username)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="User not found")
+    user = CurrentUser(row.id, row.username)
+    token_cache.put(token, username, user, expires)
+    return user
+
+async def find_user(db, username):
+    return (await db.execute(select(User).where(User.username == username))).scalars().first()
+
+async def find_category(db, name, user_id):
+    return (await db.execute(select(Category).where(
+        Category.name == name,
+        Category.user_id == user_id
+    ))).scalars().first()
+
+async def category_map(db, user_id, collection=None):
+    # {category id: name}, shared with the sync app's cache
+    categories = category_cache.get(user_id, collection)
+    if categories is None:
+        version = category_cache.version()
+        rows = (await db.execute(
+            select(Category.id, Category.name).where(Category.user_id == user_id)
+        )).all()
+        categories = category_cache.fill(user_id, rows, version, collection)
+    return categories
+
+async def category_ids(db, user_id):
+    # {name: category id}
+    return {name: i for i, name in (await category_map(db, user_id)).items()}
+
+async def collection_etag(db, user_id, *resources):
+    rows = (await db.execute(versions_query(user_id, resources))).all()
+    return versions_etag(user_id, resources, rows)
+
+async def find_expense(db, expense_id, user_id, for_update=False):
+    query = select(Expense).where(Expense.id == expense_id, Expense.user_id == user_id)
+    if for_update:
+        query = query.with_for_update()
+    return (await db.execute(query)).scalars().first()
+
+# ─── Auth Endpoints ───────────────────────────────────────────────
+
+@app.get("/")
+async def home():
+    return {"message": "Expense Tracker API v2 — SQLAlchemy + PostgreSQL (async)!"}
+
+@app.post("/auth/register")
+async def register(user: UserInput, db: AsyncSession = Depends(get_db)):
+    if await find_user(db, user.username):
+        raise HTTPException(status_code=400, detail="Username already exists")
+    hashed_password = await hash_password_async(user.password)
+    db.add(User(username=user.username, password=hashed_password))
+    await db.commit()
+    return {"message": f"User '{user.username}' registered successfully!"}
+
+@app.post("/auth/login")
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await find_user(db, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.password):
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+    return {"access_token": create_token(user.username), "token_type": "bearer"}
+
+# ─── Metrics Endpoint ─────────────────────────────────────────────
+
+@app.get("/metrics")
+async def metrics():
+    return {"password_hashing": hash_pool.stats(), "database": database_metrics()}
+
+# ─── Category Endpoints ───────────────────────────────────────────
+
+@app.get("/categories")
+async def get_categories(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    rows = (await db.execute(versions_query(current_user.id, ("categories",)))).all()
+    etag = versions_etag(current_user.id, ("categories",), rows)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers.update(cache_headers(etag))
+    # the body must be at least as new as the version behind the ETag
+    categories = await category_map(db, current_user.id, dict(rows).get("categories", 0))
+    return [{"id": i, "name": n} for i, n in categories.items()]
+
+@app.post("/categories")
+async def create_category(
+    category: CategoryInput,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    new_cat = Category(name=category.name, user_id=current_user.id)
+    db.add(new_cat)
+    try:
+        await bump_versions_async(db, current_user.id, "categories")
+        await db.commit()
+    except IntegrityError:      # (user_id, name) is unique
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Category already exists")
+    category_cache.added(current_user.id, new_cat.id, new_cat.name)
+    return {"message": f"Category '{category.name}' created successfully!"}
+
+@app.put("/categories/{name}")
+async def update_category(
+    name: str,
+    category: CategoryInput,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    cat = await find_category(db, name, current_user.id)
+    if not cat:
+        raise HTTPException(status_code=404, detail="Category not found")
+    cat.name = category.name
+    try:
+        await bump_versions_async(db, current_user.id, "categories")
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Category already exists")
+    category_cache.renamed(current_user.id, name, category.name)
+    return {"message": "Category updated successfully!"}
+
+@app.delete("/categories/{name}")
+async def delete_category(
+    name: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    cat = await find_category(db, name, current_user.id)
+    if not cat:
+        raise HTTPException(status_code=404, detail="Category not found")
+    in_use = (await db.execute(select(Expense.id).where(
+        Expense.user_id == current_user.id,
+        Expense.category_id == cat.id
+    ).limit(1))).first()
+    if in_use:
+        raise HTTPException(status_code=400, detail="Category still has expenses")
+    await db.delete(cat)
+    await bump_versions_async(db, current_user.id, "categories")
+    await db.commit()
+    category_cache.removed(current_user.id, name)
+    return {"message": f"Category '{name}' deleted successfully!"}
+
+# ─── Expense Endpoints ────────────────────────────────────────────
+
+async def stream_expenses(user_id, after=None, date_from=None, date_to=None):
+    # own session: the response body outlives the request's get_db session
+    async with AsyncSessionLocal() as db:
+        query = expenses_page_query(user_id, after, date_from, date_to)
+        result = await db.stream(query.execution_options(
+            yield_per=STREAM_BATCH_SIZE     # server-side cursor, fetched in batches
+        ))
+        async for rows in result.partitions():
+            for expense in EXPENSE_LAYOUT.objects(rows):
+                yield expense
+
+@app.get("/expenses")
+async def get_expenses(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str = None,
+    stream: bool = False,
+    date_from: datetime.date = Query(None, alias="from"),
+    date_to: datetime.date = Query(None, alias="to"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    cursor = None
+    if after:
+        cursor = decode_cursor(after)
+        if cursor is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    etag = await collection_etag(db, current_user.id, "expenses", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    if stream:
+        rows = stream_expenses(current_user.id, cursor, date_from, date_to)
+        return StreamingResponse(
+            ndjson_lines_async(rows), media_type="application/x-ndjson", headers=cache_headers(etag)
+        )
+    headers = cache_headers(etag)
+    expenses = (await db.execute(
+        expenses_page_query(current_user.id, cursor, date_from, date_to).limit(limit + 1)
+    )).all()
+    if len(expenses) > limit:
+        expenses = expenses[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(expenses[-1].date, expenses[-1].id)
+    return EXPENSE_LAYOUT.response(expenses, headers=headers)
+
+@app.get("/expenses/category/{category_name}")
+async def get_expenses_by_category(
+    category_name: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    expenses = (await db.execute(expense_rows(current_user.id).where(
+        Category.user_id == current_user.id,
+        Category.name == category_name
+    ))).all()
+    return EXPENSE_LAYOUT.response(expenses)
+
+@app.get("/expenses/{expense_id}")
+async def get_expense(
+    expense_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    expense = (await db.execute(
+        expense_rows(current_user.id).where(Expense.id == expense_id)
+    )).first()
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return {"id": expense.id, "title": expense.title, "amount": expense.amount,
+            "category": expense.category, "date": expense.date}
+
+@app.post("/expenses")
+async def create_expense(
+    expense: ExpenseInput,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    category_id = (await category_ids(db, current_user.id)).get(expense.category)
+    if category_id is None:
+        raise HTTPException(status_code=400, detail="Unknown category")
+    db.add(Expense(
+        title=expense.title,
+        amount=expense.amount,
+        category_id=category_id,
+        date=expense.date,
+        user_id=current_user.id
+    ))
+    await apply_expense_changes_async(db, current_user.id, [(category_id, expense.date, expense.amount, 1)])
+    await db.commit()
+    return {"message": f"Expense '{expense.title}' created successfully!"}
+
+@app.post("/expenses/bulk")
+async def bulk_create_expenses(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # streamed JSON array, NDJSON or CSV upload, inserted in batches
+    if not detect_format(request.headers.get("content-type")):
+        raise HTTPException(status_code=415, detail="Send application/json, application/x-ndjson or text/csv")
+
+    categories = await category_ids(db, current_user.id)
+
+    async def insert_rows(expenses):
+        await db.execute(insert(Expense), [
+            {"title": e.title, "amount": e.amount, "category_id": categories[e.category],
+             "date": e.date, "user_id": current_user.id}
+            for e in expenses
+        ])
+        await apply_expense_changes_async(db, current_user.id, [
+            (categories[e.category], e.date, e.amount, 1) for e in expenses
+        ])
+        await db.commit()
+        return len(expenses)
+
+    return await import_expenses(
+        request, ExpenseInput, insert_rows,
+        check=lambda expense: None if expense.category in categories else "unknown category"
+    )
+
+@app.put("/expenses/{expense_id}")
+async def update_expense(
+    expense_id: int,
+    expense: ExpenseUpdate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    existing = await find_expense(db, expense_id, current_user.id, for_update=True)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    if expense.category:
+        category_id = (await category_ids(db, current_user.id)).get(expense.category)
+        if category_id is None:
+            raise HTTPException(status_code=400, detail="Unknown category")
+    removed = (existing.category_id, existing.date, -existing.amount, -1)
+
+    if expense.title:    existing.title    = expense.title
+    if expense.amount:   existing.amount   = expense.amount
+    if expense.category: existing.category_id = category_id
+    if expense.date:     existing.date     = expense.date
+
+    await apply_expense_changes_async(db, current_user.id, [
+        removed, (existing.category_id, existing.date, existing.amount, 1)
+    ])
+    await db.commit()
+    return {"message": "Expense updated successfully!"}
+
+@app.delete("/expenses/{expense_id}")
+async def delete_expense(
+    expense_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    existing = await find_expense(db, expense_id, current_user.id, for_update=True)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    await db.delete(existing)
+    await apply_expense_changes_async(db, current_user.id, [
+        (existing.category_id, existing.date, -existing.amount, -1)
+    ])
+    await db.commit()
+    return {"message": "Expense deleted successfully!"}
+
+# ─── Summary Endpoint ─────────────────────────────────────────────
+
+@app.get("/summary")
+async def get_summary(
+    request: Request,
+    response: Response,
+    granularity: Literal["month", "week"] = None,
+    date_from: datetime.date = Query(None, alias="from"),
+    date_to: datetime.date = Query(None, alias="to"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    etag = await collection_etag(db, current_user.id, "expenses", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers.update(cache_headers(etag))
+    if granularity:                             # totals per month / week
+        rows = (await db.execute(period_summary_query(
+            db.bind.dialect.name, current_user.id, granularity, date_from, date_to
+        ))).all()
+        return {"granularity": granularity, "periods": period_totals(rows)}
+    # served from expense_totals: one row per category, no scan of expenses
+    breakdown = (await db.execute(
+        select(Category.name, ExpenseTotal.total)
+        .join(Category, Category.id == ExpenseTotal.category_id)
+        .where(ExpenseTotal.user_id == current_user.id)
+    )).all()
+
+    return {
+        "total_spent": round(sum(row[1] for row in breakdown), 2),
+        "by_category": {row[0]: round(row[1], 2) for row in breakdown}
+    }
+
+# ─── Analytics Endpoints ──────────────────────────────────────────
+
+@app.get("/analytics/timeseries")
+async def get_timeseries(
+    granularity: Literal["day", "month"] = "day",
+    date_from: datetime.date = Query(None, alias="from"),
+    date_to: datetime.date = Query(None, alias="to"),
+    category: str = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    categories = await category_map(db, current_user.id)
+    category_id = None
+    if category:
+        category_id = {name: i for i, name in categories.items()}.get(category)
+        if category_id is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+    rows = (await db.execute(
+        timeseries_query(current_user.id, granularity, date_from, date_to, category_id)
+    )).all()
+    return timeseries_response(granularity, rows, categories)
@@ -0,0 +1,64 @@
+import argparse
+import sys
+
+# ─── Maintenance Commands ─────────────────────────────────────────
+# python manage.py summary-check   [--app v1|v2] [--db expense_tracker.db]
+# python manage.py summary-rebuild [--app v1|v2] [--db expense_tracker.db]
+# python manage.py rollup-backfill [--batch 100] [--restart]
+#
+# v1 is the sqlite3 app in main.py, v2 the SQLAlchemy app in main_v2.py
+# (which reads DATABASE_URL like the app does). rollup-backfill is v2 only
+# and picks up after the last user it finished if it was interrupted.
+
+def summary_check(args):
+    if args.app == "v1":
+        from main import DatabaseManager
+        mismatches = DatabaseManager(args.db).check_summary()
+    else:
+        from database import SessionLocal, check_expense_totals
+        with SessionLocal() as db:
+            mismatches = check_expense_totals(db)
+    for user_id, category_id, total, actual, count, actual_count in mismatches:
+        print(f"user {user_id} / category {category_id}: stored {total or 0:.2f} ({count or 0} rows), "
+              f"actual {actual or 0:.2f} ({actual_count or 0} rows)")
+    print(f"{len(mismatches)} mismatched summary row(s)")
+    return 1 if mismatches else 0
+
+def summary_rebuild(args):
+    if args.app == "v1":
+        from main import DatabaseManager
+        DatabaseManager(args.db).rebuild_summary()
+    else:
+        from database import SessionLocal, rebuild_expense_totals
+        with SessionLocal() as db:
+            rebuild_expense_totals(db)
+    print("Summary table rebuilt from expenses")
+    return 0
+
+def rollup_backfill(args):
+    from database import backfill_rollups
+    done = backfill_rollups(
+        batch_size=args.batch, restart=args.restart,
+        progress=lambda user_id: print(f"user {user_id} rolled up", flush=True),
+    )
+    print(f"Rollups rebuilt for {done} user(s)")
+    return 0
+
+COMMANDS = {
+    "summary-check": summary_check,
+    "summary-rebuild": summary_rebuild,
+    "rollup-backfill": rollup_backfill,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Expense tracker maintenance")
+    parser.add_argument("command", choices=COMMANDS)
+    parser.add_argument("--app", choices=["v1", "v2"], default="v1")
+    parser.add_argument("--db", default="expense_tracker.db", help="sqlite file for the v1 app")
+    parser.add_argument("--batch", type=int, default=100, help="users per rollup-backfill batch")
+    parser.add_argument("--restart", action="store_true", help="rollup-backfill from the first user")
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
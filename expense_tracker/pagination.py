@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import date
+from fast_json import dumps
+
+# ─── Keyset Pagination ────────────────────────────────────────────
+# Expenses are paged on (date, id): the "after" cursor is an opaque token
+# holding the sort key of the last row the client received, so every page
+# is an index range scan no matter how deep into the list it is.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(expense_date, expense_id):
+    raw = json.dumps([str(expense_date), expense_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        expense_date, expense_id = json.loads(raw)
+        return date.fromisoformat(expense_date), int(expense_id)
+    except (ValueError, TypeError):
+        return None     # malformed or tampered cursor
+
+# ─── Streaming ────────────────────────────────────────────────────
+
+def ndjson_lines(rows):
+    # one JSON document per line, encoded as rows come off the cursor
+    for row in rows:
+        yield dumps(row) + b"\n"       # dates as YYYY-MM-DD
+
+async def ndjson_lines_async(rows):
+    async for row in rows:
+        yield dumps(row) + b"\n"
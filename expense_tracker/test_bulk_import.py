@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import bulk_import
+from bulk_import import BulkFormatError, iter_csv, iter_json_array, iter_ndjson
+
+# ─── Bulk Import Parser Tests ─────────────────────────────────────
+# The three upload parsers fed the same body in chunks of every size, so
+# rows, strings, numbers and UTF-8 characters are cut at every place a
+# network read could cut them, and bodies they must refuse.
+#
+#   pytest test_bulk_import.py        or        python test_bulk_import.py
+
+CHUNK_SIZES = (1, 2, 3, 7, 64, 1 << 20)
+
+def parse(parser, body, size):
+    # (items, error, chunks read) for body split into size-byte chunks
+    read = []
+
+    async def chunks():
+        for start in range(0, len(body), size):
+            read.append(start)
+            yield body[start:start + size]
+
+    async def run():
+        items = []
+        try:
+            async for item in parser(chunks()):
+                items.append(item)
+        except BulkFormatError as exc:
+            return items, str(exc), len(read)
+        return items, None, len(read)
+
+    return asyncio.run(run())
+
+def every_chunking(parser, body):
+    # the items, the same whatever the chunk size
+    results = {size: parse(parser, body, size)[:2] for size in CHUNK_SIZES}
+    first = results[CHUNK_SIZES[0]]
+    assert all(result == first for result in results.values()), results
+    return first
+
+# ─── JSON Array ───────────────────────────────────────────────────
+
+ROWS = [
+    {"title": "Lunch, \"big\" ] [", "amount": 12.5, "category": "Food", "date": "2026-02-01"},
+    {"title": "Café ☕", "amount": -1.5e+3, "category": "Drinks", "date": "2026-02-02"},
+    {"title": "", "amount": 0, "tags": [1, {"a": None}], "paid": True},
+]
+
+def test_json_array_rows():
+    body = json.dumps(ROWS, ensure_ascii=False, indent=1).encode()
+    items, error = every_chunking(iter_json_array, body)
+    assert error is None
+    assert items == [(i + 1, row, None) for i, row in enumerate(ROWS)]
+    assert every_chunking(iter_json_array, b"\xef\xbb\xbf  [ ]") == ([], None)    # BOM, empty
+
+def test_json_array_refuses_other_bodies():
+    assert every_chunking(iter_json_array, b'{"title": "x"}') == ([], "body is not a JSON array")
+    items, error = every_chunking(iter_json_array, b'[{"amount": 1}, {"amount": ')
+    assert items == [(1, {"amount": 1}, None)]
+    assert error == "invalid or truncated JSON after row 1"
+
+def test_json_array_fails_at_a_malformed_row():
+    # the error is raised where the bad row is, not after the rest of the
+    # upload has been buffered
+    body = b'[{"amount": 1}, {bad}, ' + b'{"amount": 2}, ' * 20000 + b'{"amount": 3}]'
+    for size in (7, 64, 4096):
+        items, error, read = parse(iter_json_array, body, size)
+        assert items == [(1, {"amount": 1}, None)]
+        assert error.startswith("invalid JSON in row 2: Expecting property name")
+        assert read * size < 100 + 2 * size
+
+def test_json_array_caps_an_unfinished_row():
+    size, bulk_import.MAX_ROW_SIZE = bulk_import.MAX_ROW_SIZE, 1000
+    try:
+        body = b'[{"amount": 1}, {"title": "' + b"x" * 5000
+        items, error, read = parse(iter_json_array, body, 100)
+    finally:
+        bulk_import.MAX_ROW_SIZE = size
+    assert items == [(1, {"amount": 1}, None)]
+    assert error == "row 2 is over 1000 characters"
+    assert read < 15
+
+# ─── NDJSON ───────────────────────────────────────────────────────
+
+def test_ndjson_rows():
+    lines = [json.dumps(row, ensure_ascii=False) for row in ROWS]
+    body = ("\r\n".join([lines[0], "", "   ", lines[1], "{not json", lines[2]])).encode()
+    items, error = every_chunking(iter_ndjson, body)          # no newline after the last
+    assert error is None
+    assert [item[0] for item in items] == [1, 2, 3, 4]        # blank lines aren't rows
+    assert [item[1] for item in items] == [ROWS[0], ROWS[1], None, ROWS[2]]
+    assert items[2][2].startswith("invalid JSON")
+
+def test_ndjson_caps_a_line():
+    size, bulk_import.MAX_ROW_SIZE = bulk_import.MAX_ROW_SIZE, 1000
+    try:
+        items, error, read = parse(iter_ndjson, b'{"amount": 1}\n' + b"x" * 5000, 100)
+    finally:
+        bulk_import.MAX_ROW_SIZE = size
+    assert items == [(1, {"amount": 1}, None)]
+    assert error == "a line is over 1000 characters"
+    assert read < 15
+
+# ─── CSV ──────────────────────────────────────────────────────────
+
+def test_csv_rows():
+    body = (
+        'Title,Amount,CATEGORY,date\r\n'
+        'Lunch,12.5,Food,2026-02-01\r\n'
+        '"Dinner, with ""friends""\nand a second line",40,Food,2026-02-02\r\n'
+        '\r\n'
+        'Too,few\r\n'
+        'Café ☕,3,Drinks,2026-02-03'
+    ).encode()
+    items, error = every_chunking(iter_csv, body)
+    assert error is None
+    assert items == [
+        (1, {"title": "Lunch", "amount": "12.5", "category": "Food", "date": "2026-02-01"}, None),
+        (2, {"title": 'Dinner, with "friends"\nand a second line', "amount": "40",
+             "category": "Food", "date": "2026-02-02"}, None),
+        (3, None, "expected 4 columns, got 2"),
+        (4, {"title": "Café ☕", "amount": "3", "category": "Drinks", "date": "2026-02-03"}, None),
+    ]
+
+def test_csv_unterminated_quote():
+    items, error = every_chunking(iter_csv, b'title,amount\nLunch,1\n"Dinner,2\nBus,3\n')
+    assert items == [(1, {"title": "Lunch", "amount": "1"}, None), (2, None, "unterminated quoted field")]
+    size, bulk_import.MAX_ROW_SIZE = bulk_import.MAX_ROW_SIZE, 1000
+    try:
+        items, error, read = parse(iter_csv, b'title,amount\n"Dinner,2\n' + b"Bus,3\n" * 1000, 100)
+    finally:
+        bulk_import.MAX_ROW_SIZE = size
+    assert error == "row 1 is over 1000 characters"
+    assert read < 15
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("bulk_import ✅")
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import uuid
+
+# ─── Schema Migration Tests ───────────────────────────────────────
+# main.py's DatabaseManager on a new database and on one created by the
+# first version of the app: both must end on the same tables and indexes,
+# with the old rows carried over, or refuse, keeping every row, when the
+# old rows can't be. database.py's run_migrations likewise, and with
+# several workers starting on one old database at once.
+#
+#   pytest test_migrations.py        or        python test_migrations.py
+
+TMP = tempfile.mkdtemp()
+os.environ["EXPENSE_DB"] = os.path.join(TMP, "app.db")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(TMP, "v2.db"))
+
+from main import DatabaseManager, DuplicateCategories
+
+LEGACY_SCHEMA = """
+    CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+                        password TEXT NOT NULL);
+    CREATE TABLE categories (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                             user_id INTEGER NOT NULL, FOREIGN KEY (user_id) REFERENCES users(id));
+    CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                           amount REAL NOT NULL, category TEXT NOT NULL, date TEXT NOT NULL,
+                           user_id INTEGER NOT NULL, FOREIGN KEY (user_id) REFERENCES users(id));
+"""
+
+def path():
+    return os.path.join(TMP, f"{uuid.uuid4().hex}.db")
+
+def legacy(categories=(("Food", 1),)):
+    # a database as the first version of main.py left it
+    db_path = path()
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+        conn.execute("INSERT INTO users (username, password) VALUES ('ann', 'x')")
+        conn.executemany("INSERT INTO categories (name, user_id) VALUES (?, ?)", categories)
+        conn.executemany(
+            "INSERT INTO expenses (title, amount, category, date, user_id) VALUES (?, ?, ?, ?, 1)",
+            [("Lunch", 12.5, "Food", "2026-02-01"), ("Bus", 2.5, "Travel", "2026-02-03")]
+        )
+    return db_path
+
+def schema(db_path):
+    # {table: column names}, and the index definitions
+    with sqlite3.connect(db_path) as conn:
+        tables = {name: sorted(row[1] for row in conn.execute(f"PRAGMA table_info({name})"))
+                  for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        indexes = sorted(sql for sql, in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"))
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    return tables, indexes, version
+
+def test_new_database_starts_on_the_current_schema():
+    db_path = path()
+    DatabaseManager(db_path)
+    with sqlite3.connect(db_path) as conn:
+        columns = {row[1]: (row[2], row[3]) for row in conn.execute("PRAGMA table_info(expenses)")}
+    assert columns["category_id"] == ("INTEGER", 1)         # NOT NULL, as the v2 model
+    assert columns["date"] == ("DATE", 1)
+    assert "category" not in columns
+    assert schema(db_path)[2] == DatabaseManager.MIGRATIONS[-1][0]
+
+def test_legacy_database_is_migrated_to_the_same_schema():
+    fresh, upgraded = path(), legacy()
+    DatabaseManager(fresh)
+    db = DatabaseManager(upgraded)
+    assert schema(upgraded) == schema(fresh)
+    assert db.get_summary(1) == {"total_spent": 15.0, "by_category": {"Food": 12.5, "Travel": 2.5}}
+    assert not db.check_summary()
+    with sqlite3.connect(upgraded) as conn:
+        assert conn.execute(
+            """SELECT e.title, c.name, e.date FROM expenses e JOIN categories c ON c.id = e.category_id
+               ORDER BY e.id"""
+        ).fetchall() == [("Lunch", "Food", "2026-02-01"), ("Bus", "Travel", "2026-02-03")]
+
+DUPLICATED = (("Food", 1), ("Travel", 1), ("Food", 1), ("Food", 1))
+
+def categories(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT id, name FROM categories ORDER BY id").fetchall()
+
+def test_duplicate_categories_are_reported_not_deleted():
+    db_path = legacy(categories=DUPLICATED)
+    try:
+        DatabaseManager(db_path)
+    except DuplicateCategories as error:
+        assert error.duplicates == [(1, "Food", "1,3,4")]
+    else:
+        raise AssertionError("expected DuplicateCategories")
+    assert categories(db_path) == [(1, "Food"), (2, "Travel"), (3, "Food"), (4, "Food")]
+    assert schema(db_path)[2] == 1                          # migration 2 not applied
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE categories SET name = 'Groceries' WHERE id = 3")
+        conn.execute("DELETE FROM categories WHERE id = 4")
+    DatabaseManager(db_path)                                # resolved: the rest runs
+    fresh = path()
+    DatabaseManager(fresh)
+    assert schema(db_path) == schema(fresh)
+
+def test_v2_duplicate_categories_are_reported_not_deleted():
+    import database
+    from sqlalchemy import create_engine
+
+    db_path = legacy(categories=DUPLICATED)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY)")
+    engine, database.engine = database.engine, create_engine("sqlite:///" + db_path)
+    try:
+        database.run_migrations()
+    except database.DuplicateCategories as error:
+        assert error.duplicates == [(1, "Food", "1,3,4")]
+    else:
+        raise AssertionError("expected DuplicateCategories")
+    finally:
+        database.engine.dispose()
+        database.engine = engine
+    assert categories(db_path) == [(1, "Food"), (2, "Travel"), (3, "Food"), (4, "Food")]
+    with sqlite3.connect(db_path) as conn:
+        assert [v for v, in conn.execute("SELECT version FROM schema_version")] == [1]
+
+def test_v2_workers_migrate_one_at_a_time():
+    # each worker must either apply a migration or find it applied, never
+    # both apply it (a duplicate column, or a second schema_version row)
+    import database
+    from sqlalchemy import create_engine
+
+    db_path = legacy()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY)")
+    engine, database.engine = database.engine, create_engine("sqlite:///" + db_path)
+    barrier, errors = threading.Barrier(4), []
+
+    def worker():
+        barrier.wait()
+        try:
+            database.run_migrations()
+        except Exception as error:
+            errors.append(error)
+
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        database.engine.dispose()
+        database.engine = engine
+    assert not errors, errors
+    with sqlite3.connect(db_path) as conn:
+        assert [v for v, in conn.execute("SELECT version FROM schema_version ORDER BY version")] == \
+            [version for version, _ in database.MIGRATIONS]
+        columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(expenses)")}
+        assert columns["date"] == "DATE" and "category" not in columns
+        assert conn.execute(
+            "SELECT e.title, c.name FROM expenses e JOIN categories c ON c.id = e.category_id ORDER BY e.id"
+        ).fetchall() == [("Lunch", "Food"), ("Bus", "Travel")]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("migrations ✅")
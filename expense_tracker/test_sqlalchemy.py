@@ -1,3 +1,4 @@
+import datetime
 from database import init_db, SessionLocal, User, Category, Expense
 from auth import hash_password
 
@@ -23,8 +24,8 @@ print(f"Category created: {cat.name} ✅")
 expense = Expense(
     title="Lunch",
     amount=12.50,
-    category="Food",
-    date="2026-02-21",
+    category_id=cat.id,
+    date=datetime.date(2026, 2, 21),
     user_id=user.id
 )
 session.add(expense)
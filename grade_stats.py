@@ -0,0 +1,110 @@
+import threading
+import numpy as np
+
+# ─── Grade Statistics ─────────────────────────────────────────────
+# Per-course grade statistics from one matrix: counts[course, grade] is the
+# number of students in the course with that grade. Grades are whole
+# numbers from 0 to 100 (checked on every write), so the matrix is
+# courses x 101 whatever the number of students. Rows from before that
+# check can hold anything; every path counts them at the nearest end of
+# the range, so adding and later removing one always meets the same cell.
+# It's filled from the students table once, a grade write is a +1 / -1 on
+# two cells, and count, mean, stddev, percentiles and histograms are all
+# vectorised over it. Results are cached until the next write.
+
+GRADES = np.arange(101)
+LOWEST, HIGHEST = 0, 100
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_WIDTH = 10            # 0-9, 10-19, ... 90-100 (100 joins the last bin)
+
+def cell(grade):
+    # the column a grade is counted in
+    return min(max(int(grade), LOWEST), HIGHEST)
+
+class GradeStats:
+    def __init__(self, rows=()):
+        # rows: (course, grade, count), e.g. a GROUP BY course, grade
+        self.lock = threading.Lock()
+        self.courses = {}       # course -> row of counts
+        self.counts = np.zeros((0, GRADES.size), dtype=np.int64)
+        self.cached = None
+        self.out_of_range = 0   # students loaded with a grade outside 0-100
+        rows = list(rows)
+        if rows:
+            courses, grades, counts = zip(*rows)
+            codes = np.array([self._code(course) for course in courses])
+            grades = np.array(grades, dtype=np.int64)
+            counts = np.array(counts, dtype=np.int64)
+            self.out_of_range = int(counts[(grades < LOWEST) | (grades > HIGHEST)].sum())
+            np.add.at(self.counts, (codes, np.clip(grades, LOWEST, HIGHEST)), counts)
+
+    def _code(self, course):
+        code = self.courses.get(course)
+        if code is None:
+            code = self.courses[course] = len(self.courses)
+            self.counts = np.vstack([self.counts, np.zeros((1, GRADES.size), dtype=np.int64)])
+        return code
+
+    # ── Updates ────────────────────────────────────────────────────
+    def add(self, course, grade, n=1):
+        with self.lock:
+            code = self._code(course)           # may grow the matrix, so first
+            self.counts[code, cell(grade)] += n
+            self.cached = None
+
+    def remove(self, course, grade):
+        self.add(course, grade, -1)
+
+    def move(self, old, new):
+        # old, new: (course, grade) of one student before and after a write
+        if old != new:
+            with self.lock:
+                before, after = self._code(old[0]), self._code(new[0])
+                self.counts[before, cell(old[1])] -= 1
+                self.counts[after, cell(new[1])] += 1
+                self.cached = None
+
+    # ── Queries ────────────────────────────────────────────────────
+    def by_course(self):
+        with self.lock:
+            if self.cached is None:
+                self.cached = self._compute(list(self.courses), self.counts.copy())
+            return self.cached
+
+    @staticmethod
+    def _compute(names, counts):
+        # one row per course plus an "overall" row, every statistic at once
+        table = np.vstack([counts, counts.sum(axis=0)])
+        n = table.sum(axis=1)
+        filled = np.maximum(n, 1)
+        mean = table @ GRADES / filled
+        stddev = np.sqrt(np.maximum(table @ GRADES ** 2 / filled - mean ** 2, 0))
+
+        # linear interpolation between the two nearest ranks, as np.percentile;
+        # the grade at rank r is the first whose cumulative count exceeds r
+        cumulative = table.cumsum(axis=1)
+        position = (filled[:, None] - 1) * (np.array(PERCENTILES) / 100)
+        low, high = np.floor(position), np.ceil(position)
+        grade_at = lambda rank: (cumulative[:, :, None] > rank[:, None, :]).argmax(axis=1)
+        below, above = grade_at(low), grade_at(high)
+        percentiles = below + (above - below) * (position - low)
+
+        histogram = table[:, :100].reshape(len(table), -1, HISTOGRAM_WIDTH).sum(axis=2)
+        histogram[:, -1] += table[:, 100]
+        labels = [f"{start}-{start + HISTOGRAM_WIDTH - 1}" for start in range(0, 100, HISTOGRAM_WIDTH)]
+        labels[-1] = f"{100 - HISTOGRAM_WIDTH}-100"
+
+        stats = {}
+        for i, name in enumerate([*names, None]):
+            if not n[i]:
+                continue            # a course whose students have all gone
+            stats[name] = {
+                "count": int(n[i]),
+                "mean": round(float(mean[i]), 2),
+                "median": float(percentiles[i, PERCENTILES.index(50)]),
+                "stddev": round(float(stddev[i]), 2),
+                "percentiles": {f"p{p}": float(percentiles[i, j]) for j, p in enumerate(PERCENTILES)},
+                "histogram": dict(zip(labels, histogram[i].tolist())),
+            }
+        overall = stats.pop(None, None)
+        return {"by": "course", "courses": stats, "overall": overall}
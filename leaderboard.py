@@ -0,0 +1,94 @@
+import math
+import threading
+from bisect import bisect_left, bisect_right
+
+# ─── Grade Leaderboard ────────────────────────────────────────────
+# Students ordered best grade first, kept in memory next to the students
+# table: loaded once at startup and updated by every write after it
+# commits. Two parallel sorted arrays hold the order, so ranks, pages of
+# the top and percentiles are bisects, never a query.
+#
+#   keys    (-grade, name)  the order itself, ties by name
+#   scores  -grade          the same order, for "how many score above g"
+
+class Leaderboard:
+    def __init__(self, rows=()):
+        # rows: (id, name, age, grade, course) tuples
+        self.lock = threading.Lock()
+        self.rows = {row[1]: row for row in rows}          # name -> row
+        self.keys = sorted((-row[3], row[1]) for row in self.rows.values())
+        self.scores = [key[0] for key in self.keys]
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ── Updates ────────────────────────────────────────────────────
+    def _remove(self, name):
+        row = self.rows.pop(name, None)
+        if row is not None:
+            i = bisect_left(self.keys, (-row[3], name))
+            del self.keys[i]
+            del self.scores[i]
+
+    def _put(self, row):
+        self._remove(row[1])
+        self.rows[row[1]] = row
+        key = (-row[3], row[1])
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.scores.insert(i, key[0])
+
+    def put(self, row):
+        # add a student, or move one whose grade or details changed
+        with self.lock:
+            self._put(row)
+
+    def update(self, name, **changes):
+        # changes: any of age, grade, course; read and written under one
+        # hold of the lock, so concurrent updates don't lose each other's fields
+        with self.lock:
+            row = self.rows.get(name)
+            if row is not None:
+                student_id, _, age, grade, course = row
+                self._put((student_id, name, changes.get("age", age),
+                           changes.get("grade", grade), changes.get("course", course)))
+
+    def remove(self, name):
+        with self.lock:
+            self._remove(name)
+
+    # ── Queries ────────────────────────────────────────────────────
+    def get(self, name):
+        with self.lock:
+            return self.rows.get(name)
+
+    def count_at_least(self, grade):
+        with self.lock:
+            return bisect_right(self.scores, -grade)
+
+    def top(self, limit, offset=0, min_grade=None):
+        # rows from best to worst, optionally only those at min_grade or above
+        with self.lock:
+            end = len(self.keys) if min_grade is None else bisect_right(self.scores, -min_grade)
+            names = [name for _, name in self.keys[offset:min(offset + limit, end)]]
+            return [self.rows[name] for name in names]
+
+    def rank(self, name):
+        # (rank, students ranked, percentile) or None; tied grades share the
+        # best rank, and the percentile is the share scoring at or below
+        with self.lock:
+            row = self.rows.get(name)
+            if row is None:
+                return None
+            total = len(self.scores)
+            above = bisect_left(self.scores, -row[3])
+            return above + 1, total, round(100 * (total - above) / total, 2)
+
+    def percentile(self, p):
+        # row at the p-th percentile (nearest rank, 0 < p <= 100) or None
+        with self.lock:
+            total = len(self.keys)
+            if not total:
+                return None
+            k = max(1, math.ceil(p / 100 * total))      # k-th lowest grade
+            return self.rows[self.keys[total - k][1]]
@@ -0,0 +1,254 @@
+import mmap
+import os
+import shutil
+import stat
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+
+# ─── Snapshot Format ──────────────────────────────────────────────
+# A Library catalog as one binary file that is mapped, not parsed:
+#
+#   header | records | string heap | title index
+#
+# Records are fixed width, so book i is at a known offset. Titles and
+# authors are UTF-8 in the heap. The title index is an open-addressing
+# hash table of record numbers, keyed on crc32 of the title, built when the
+# snapshot is written. Opening a snapshot maps it and reads the header,
+# whatever its size; pages come in as books are touched. The availability
+# flag is the only mutable byte, and is written in place.
+
+MAGIC = b"LIBSNAP1"
+HEADER = struct.Struct("<8sQQQQ")           # magic, count, heap offset, index offset, index slots
+RECORD = struct.Struct("<QQIIB7x")          # title offset, author offset, title length, author length, available
+FLAG_OFFSET = 24                            # of "available" within a record
+SLOT = struct.Struct("<Q")                  # record number + 1, 0 = empty
+
+class SnapshotError(ValueError):
+    pass
+
+def _slots_for(count):
+    # power of two, at most half full, so probe chains stay short
+    slots = 8
+    while slots < 2 * count:
+        slots *= 2
+    return slots
+
+def _title_hash(title_bytes):
+    return zlib.crc32(title_bytes)
+
+# ─── Writing ──────────────────────────────────────────────────────
+
+def replace_file(tmp, filename):
+    # rename a finished temp file over filename. mkstemp creates it 0600 and
+    # the rename keeps that, so it takes the mode of the file it replaces,
+    # or the umask default for a new one
+    try:
+        mode = stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(tmp, mode)
+    os.replace(tmp, filename)
+
+def write_snapshot(books, filename):
+    # books: a sized collection of Book-like objects (title, author,
+    # is_available). Written to a temp file and renamed over filename.
+    count = len(books)
+    slots = _slots_for(count)
+    mask = slots - 1
+    index = array("Q", bytes(8 * slots))
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snapshot-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out, tempfile.TemporaryFile(dir=directory) as heap:
+            out.write(bytes(HEADER.size))           # filled in once offsets are known
+            heap_size = 0
+            for i, book in enumerate(books):
+                title, author = book.title.encode(), book.author.encode()
+                out.write(RECORD.pack(heap_size, heap_size + len(title),
+                                      len(title), len(author), 1 if book.is_available else 0))
+                heap.write(title)
+                heap.write(author)
+                heap_size += len(title) + len(author)
+                slot = _title_hash(title) & mask
+                while index[slot]:                   # copies of a title stay in record order
+                    slot = (slot + 1) & mask
+                index[slot] = i + 1
+            heap_offset = HEADER.size + count * RECORD.size
+            heap.seek(0)
+            shutil.copyfileobj(heap, out)
+            padding = -(heap_offset + heap_size) % 8
+            out.write(bytes(padding))
+            index_offset = heap_offset + heap_size + padding
+            if sys.byteorder == "big":
+                index.byteswap()                     # slots are little-endian on disk
+            index.tofile(out)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, count, heap_offset, index_offset, slots))
+            out.flush()
+            os.fsync(out.fileno())
+        replace_file(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+# ─── Reading ──────────────────────────────────────────────────────
+
+class SnapshotBook:
+    # a view of one record: fields are read from the mapping on access,
+    # and setting is_available writes the flag through to the file
+    __slots__ = ("snapshot", "number")
+
+    def __init__(self, snapshot, number):
+        self.snapshot = snapshot
+        self.number = number
+
+    @property
+    def title(self):
+        return self.snapshot.title(self.number)
+
+    @property
+    def author(self):
+        return self.snapshot.author(self.number)
+
+    @property
+    def is_available(self):
+        return self.snapshot.is_available(self.number)
+
+    @is_available.setter
+    def is_available(self, available):
+        self.snapshot.set_available(self.number, available)
+
+class Snapshot:
+    def __init__(self, filename, writable=False):
+        with open(filename, "r+b" if writable else "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            self.map.close()
+            raise SnapshotError(f"{filename} is not a library snapshot")
+        magic, self.count, self.heap_offset, self.index_offset, self.slots = HEADER.unpack_from(self.map)
+        if magic != MAGIC or self.index_offset + 8 * self.slots != len(self.map):
+            self.map.close()
+            raise SnapshotError(f"{filename} is not a library snapshot")
+        self.writable = writable
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError(number)
+        return RECORD.unpack_from(self.map, HEADER.size + number * RECORD.size)
+
+    def _string(self, offset, length):
+        start = self.heap_offset + offset
+        return self.map[start:start + length].decode()
+
+    def title(self, number):
+        title_offset, _, title_length, _, _ = self._record(number)
+        return self._string(title_offset, title_length)
+
+    def author(self, number):
+        _, author_offset, _, author_length, _ = self._record(number)
+        return self._string(author_offset, author_length)
+
+    def is_available(self, number):
+        return self._record(number)[4] == 1
+
+    def set_available(self, number, available):
+        if not self.writable:
+            raise SnapshotError("snapshot was opened read-only")
+        self._record(number)                        # bounds check
+        self.map[HEADER.size + number * RECORD.size + FLAG_OFFSET] = 1 if available else 0
+
+    def find(self, title):
+        # record numbers of every copy of title, in the order they were saved
+        key = title.encode()
+        mask = self.slots - 1
+        slot = _title_hash(key) & mask
+        while True:
+            entry = SLOT.unpack_from(self.map, self.index_offset + slot * SLOT.size)[0]
+            if not entry:
+                return
+            title_offset, _, title_length, _, _ = self._record(entry - 1)
+            start = self.heap_offset + title_offset
+            if title_length == len(key) and self.map[start:start + title_length] == key:
+                yield entry - 1
+            slot = (slot + 1) & mask
+
+    def book(self, number):
+        self._record(number)
+        return SnapshotBook(self, number)
+
+    def __iter__(self):
+        for number in range(self.count):
+            yield SnapshotBook(self, number)
+
+    def flush(self):
+        if self.writable:
+            self.map.flush()
+
+    def close(self):
+        if not self.map.closed:
+            self.flush()
+            self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ─── Snapshot Library ─────────────────────────────────────────────
+
+class SnapshotLibrary:
+    # Library's lookups and borrow/return over a mapped snapshot; borrowing
+    # and returning flip the flag in the file, nothing else is loaded
+    def __init__(self, filename):
+        self.snapshot = Snapshot(filename, writable=True)
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    @property
+    def books(self):
+        return self.snapshot
+
+    def find_book(self, title):
+        for number in self.snapshot.find(title):
+            return self.snapshot.book(number)
+        return None
+
+    def borrow_book(self, title):
+        for number in self.snapshot.find(title):
+            if self.snapshot.is_available(number):
+                self.snapshot.set_available(number, False)
+                print(f"You have borrowed '{title}' by {self.snapshot.author(number)}.")
+                return
+        print(f"Sorry, '{title}' is not available.")
+
+    def return_book(self, title):
+        for number in self.snapshot.find(title):
+            if not self.snapshot.is_available(number):
+                self.snapshot.set_available(number, True)
+                print(f"You have returned '{title}' by {self.snapshot.author(number)}.")
+                return
+        print(f"Sorry, '{title}' was not borrowed.")
+
+    def show_books(self):
+        for book in self.snapshot:
+            status = "Available" if book.is_available else "Not Available"
+            print(f"'{book.title}' by {book.author} - {status}")
+
+    def close(self):
+        self.snapshot.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,6 +1,27 @@
+import os
+import re
 import sqlite3
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel
+from expense_tracker.http_cache import weak_etag, not_modified, cache_headers
+from expense_tracker.fast_json import RowLayout
+
+# ─── Row Layouts ──────────────────────────────────────────────────
+
+BOOK_LAYOUT = RowLayout("id", "title", "author", "is_available", is_available=bool)
+
+class DuplicateTitles(ValueError):
+    # raised at startup when books.title can't be made unique; nothing is
+    # deleted for the operator, they choose which copies to rename
+    def __init__(self, duplicates):
+        # duplicates: (title, "id,id,...") pairs
+        shown = "; ".join(f"{title!r} (ids {ids})" for title, ids in duplicates[:50])
+        more = ", ..." if len(duplicates) > 50 else ""
+        super().__init__(
+            f"{len(duplicates)} title(s) are shared by more than one book; "
+            f"rename or remove the extra copies and restart. {shown}{more}"
+        )
+        self.duplicates = duplicates
 
 # ─── Database Manager ─────────────────────────────────────────────
 
@@ -20,24 +41,100 @@ class DatabaseManager:
                     is_available INTEGER DEFAULT 1
                 )
             """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS versions (
+                    resource TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self.setup_title_index(conn)
+            self.setup_search(conn)
             conn.commit()
 
+    def setup_title_index(self, conn):
+        # a title names one book: lookups by title are an index seek, and
+        # borrow/return can be a single UPDATE keyed on it. A catalog from
+        # before the index that holds copies of a title is left as it is.
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'idx_books_title'"
+        ).fetchone():
+            return
+        duplicates = conn.execute(
+            "SELECT title, GROUP_CONCAT(id) FROM books GROUP BY title HAVING COUNT(*) > 1 ORDER BY title"
+        ).fetchall()
+        if duplicates:
+            raise DuplicateTitles(duplicates)
+        conn.execute("CREATE UNIQUE INDEX idx_books_title ON books (title)")
+
+    def setup_search(self, conn):
+        # books_fts indexes title and author of books (external content, so
+        # the text isn't stored twice); the triggers keep it in step with
+        # every write, and a catalog that predates it is indexed once
+        indexed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'books_fts'"
+        ).fetchone()
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                title, author, content='books', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+                INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+                INSERT INTO books_fts (books_fts, rowid, title, author)
+                VALUES ('delete', old.id, old.title, old.author);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+                INSERT INTO books_fts (books_fts, rowid, title, author)
+                VALUES ('delete', old.id, old.title, old.author);
+                INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+            END
+        """)
+        if not indexed:
+            conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+    def _bump_version(self, conn):
+        # every write to books moves the collection version on, in the same transaction
+        conn.execute(
+            """INSERT INTO versions (resource, version) VALUES ('books', 1)
+               ON CONFLICT (resource) DO UPDATE SET version = version + 1"""
+        )
+
+    def books_version(self):
+        with sqlite3.connect(self.db_name) as conn:
+            row = conn.execute(
+                "SELECT version FROM versions WHERE resource = 'books'"
+            ).fetchone()
+            return row[0] if row else 0
+
     def add_book(self, title, author):              # ✅ takes strings not Book object
         with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "INSERT INTO books (title, author) VALUES (?, ?)",
-                (title, author)
-            )
+            try:
+                conn.execute(
+                    "INSERT INTO books (title, author) VALUES (?, ?)",
+                    (title, author)
+                )
+            except sqlite3.IntegrityError:          # title is unique
+                conn.rollback()
+                return False
+            self._bump_version(conn)
             conn.commit()
+        return True
 
-    def get_all_books(self):                        # ✅ correct method name
+    def get_book_rows(self):                        # tuples in BOOK_LAYOUT order
         with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute("SELECT * FROM books")
-            rows = cursor.fetchall()
-            return [
-                {"id": r[0], "title": r[1], "author": r[2], "is_available": bool(r[3])}
-                for r in rows
-            ]
+            cursor = conn.execute("SELECT id, title, author, is_available FROM books")
+            return cursor.fetchall()
+
+    def get_all_books(self):                        # ✅ correct method name
+        return BOOK_LAYOUT.objects(self.get_book_rows())
 
     def get_book(self, title):                      # ✅ helper to find one book
         with sqlite3.connect(self.db_name) as conn:
@@ -46,25 +143,63 @@ class DatabaseManager:
             )
             return cursor.fetchone()
 
+    # title matches count ten times an author match in the BM25 score
+    SEARCH_SQL = """
+        SELECT b.id, b.title, b.author, b.is_available
+        FROM books_fts JOIN books b ON b.id = books_fts.rowid
+        WHERE books_fts MATCH ?
+        ORDER BY bm25(books_fts, 10.0, 1.0), b.id
+        LIMIT ? OFFSET ?
+    """
+
+    def search_books(self, query, limit, offset=0):
+        # tuples in BOOK_LAYOUT order, best match first
+        match = search_expression(query)
+        if not match:
+            return []
+        with sqlite3.connect(self.db_name) as conn:
+            return conn.execute(self.SEARCH_SQL, (match, limit, offset)).fetchall()
+
     def update_availability(self, title, is_available):  # ✅ correct method name
+        # one conditional UPDATE: the row only changes from the other state,
+        # so of two clients borrowing at once exactly one gets True
         with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "UPDATE books SET is_available = ? WHERE title = ?",
-                (1 if is_available else 0, title)
+            cursor = conn.execute(
+                "UPDATE books SET is_available = ? WHERE title = ? AND is_available = ?",
+                (1 if is_available else 0, title, 0 if is_available else 1)
             )
+            if cursor.rowcount:
+                self._bump_version(conn)
             conn.commit()
+            return cursor.rowcount == 1
 
     def delete_book(self, title):
+        # only an available book can go; False if it's borrowed or missing
         with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "DELETE FROM books WHERE title = ?", (title,)
+            cursor = conn.execute(
+                "DELETE FROM books WHERE title = ? AND is_available = 1", (title,)
             )
+            if cursor.rowcount:
+                self._bump_version(conn)
             conn.commit()
+            return cursor.rowcount == 1
+
+# ─── Search ───────────────────────────────────────────────────────
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+NEXT_OFFSET_HEADER = "X-Next-Offset"
+
+def search_expression(query):
+    # every word of the query must match; each is quoted, so FTS5 operators
+    # and punctuation typed by users are searched for, not interpreted
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"' for word in words)
 
 # ─── FastAPI Setup ────────────────────────────────────────────────
 
 app = FastAPI()
-db = DatabaseManager()
+db = DatabaseManager(os.getenv("LIBRARY_DB", "library.db"))
 
 # Add starter books only if database is empty
 if not db.get_all_books():
@@ -85,40 +220,57 @@ def home():
     return {"message": "Welcome to the Library API! Go to /docs to explore."}
 
 @app.get("/books")
-def get_books():
-    return db.get_all_books()                   # ✅ correct method name
+def get_books(request: Request):
+    etag = weak_etag("books", db.books_version())
+    unchanged = not_modified(request, etag)     # 304 without reading a book
+    if unchanged:
+        return unchanged
+    # encoded straight from the rows with orjson, no jsonable_encoder pass
+    return BOOK_LAYOUT.response(db.get_book_rows(), headers=cache_headers(etag))
+
+@app.get("/books/search")
+def search_books(
+    q: str,
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    # ranked by BM25 over books_fts; one extra row tells us there's a next page
+    rows = db.search_books(q, limit + 1, offset)
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_OFFSET_HEADER] = str(offset + limit)
+    return BOOK_LAYOUT.response(rows, headers=headers)
 
 @app.post("/books")
 def add_book(book_input: BookInput):
-    db.add_book(book_input.title, book_input.author)  # ✅ passing strings
+    if not db.add_book(book_input.title, book_input.author):  # ✅ passing strings
+        raise HTTPException(status_code=400, detail="Book already exists")
     return {"message": f"Book '{book_input.title}' added successfully!"}
 
+# borrow, return and delete try the change first; the book is only looked
+# up to explain why it didn't happen
+
 @app.put("/books/{title}/borrow")
 def borrow_book(title: str):
-    book = db.get_book(title)
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    if not book[3]:                             # book[3] is is_available
+    if not db.update_availability(title, False):    # ✅ correct method name
+        if not db.get_book(title):
+            raise HTTPException(status_code=404, detail="Book not found")
         raise HTTPException(status_code=400, detail="Book already borrowed")
-    db.update_availability(title, False)        # ✅ correct method name
     return {"message": f"You borrowed '{title}'"}
 
 @app.put("/books/{title}/return")
 def return_book(title: str):
-    book = db.get_book(title)
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    if book[3]:                                 # book[3] is is_available
+    if not db.update_availability(title, True):     # ✅ correct method name
+        if not db.get_book(title):
+            raise HTTPException(status_code=404, detail="Book not found")
         raise HTTPException(status_code=400, detail="Book was not borrowed")
-    db.update_availability(title, True)         # ✅ correct method name
     return {"message": f"You returned '{title}'"}
 
 @app.delete("/books/{title}")
 def delete_book(title: str):
-    book = db.get_book(title)
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    if not book[3]:
+    if not db.delete_book(title):
+        if not db.get_book(title):
+            raise HTTPException(status_code=404, detail="Book not found")
         raise HTTPException(status_code=400, detail="Cannot delete a borrowed book")
-    db.delete_book(title)
     return {"message": f"Book '{title}' deleted successfully!"}
\ No newline at end of file
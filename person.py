@@ -6,6 +6,7 @@
 
 
 class Person:
+    __slots__ = ("name", "age")          # no per-person __dict__; see roster.py for millions
 
     def __init__(self, name, age):
         # save name and age to self
@@ -15,6 +16,7 @@ class Person:
     def introduce(self):
             print(f"Hi I am {self.name} and I am {self.age} years old")
 class Student(Person):
+    __slots__ = ("grade",)
     def __init__(self, name, age, grade):
         super().__init__(name, age)
         self.grade = grade
@@ -24,6 +26,7 @@ class Student(Person):
         print(f"I am a student with grade {self.grade}")
 
 class Teacher(Person):
+    __slots__ = ("subject",)
     def __init__(self, name, age, subject):
         self.subject = subject
         super().__init__(name, age)
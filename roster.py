@@ -0,0 +1,260 @@
+import sys
+from array import array
+import numpy as np
+from person import Person, Student, Teacher
+
+# ─── Roster ───────────────────────────────────────────────────────
+# People as columns instead of objects: one typed array per number and
+# one list of interned names, so a million people cost a few bytes each
+# rather than an object apiece, and the repeated names and subjects are
+# stored once. Questions about everyone (who is passing, who teaches
+# Math, who is oldest) are NumPy expressions over zero-copy views of the
+# arrays, and their answers are RosterViews: row numbers, not objects.
+#
+#   kinds     B  PERSON / STUDENT / TEACHER
+#   ages      H
+#   grades    h  NO_GRADE unless a student
+#   subjects  H  code into subject_names, 0 unless a teacher
+
+PERSON, STUDENT, TEACHER = 0, 1, 2
+NO_GRADE = -1               # also a Student whose grade is None
+MAX_AGE = 0xFFFF            # what fits the columns' typecodes
+MAX_GRADE = 0x7FFF
+PASS_GRADE = 50             # as Student.is_passing in student.py
+COLUMNS = ("name", "age", "grade", "subject")
+
+def whole(value, what, low, high):
+    number = int(value)
+    if number != value or not low <= number <= high:
+        raise ValueError(f"{what} must be a whole number from {low} to {high}, not {value!r}")
+    return number
+
+class Roster:
+    def __init__(self, people=()):
+        self.kinds = array("B")
+        self.ages = array("H")
+        self.grades = array("h")
+        self.subjects = array("H")
+        self.names = []
+        self.subject_names = [None]         # subject code -> subject
+        self.subject_codes = {}             # subject -> code
+        for person in people:
+            self.append(person)
+
+    def __len__(self):
+        return len(self.names)
+
+    # ── Adding ─────────────────────────────────────────────────────
+    # every value is checked before the first column grows: a row that's
+    # refused halfway would leave the columns different lengths
+    def _add(self, kind, name, age, grade=NO_GRADE, subject=0):
+        name = sys.intern(name)
+        age = whole(age, "age", 0, MAX_AGE)
+        grade = NO_GRADE if grade is None or grade == NO_GRADE else whole(grade, "grade", 0, MAX_GRADE)
+        self.kinds.append(kind)
+        self.ages.append(age)
+        self.grades.append(grade)
+        self.subjects.append(subject)
+        self.names.append(name)
+
+    def _subject_code(self, subject):
+        code = self.subject_codes.get(subject)
+        if code is None:
+            subject = sys.intern(subject)
+            code = self.subject_codes[subject] = len(self.subject_names)
+            self.subject_names.append(subject)
+        return code
+
+    def add_person(self, name, age):
+        self._add(PERSON, name, age)
+
+    def add_student(self, name, age, grade):
+        self._add(STUDENT, name, age, grade)
+
+    def add_teacher(self, name, age, subject):
+        self._add(TEACHER, name, age, subject=self._subject_code(subject))
+
+    def append(self, person):
+        # a Person, Student or Teacher from person.py
+        if isinstance(person, Student):
+            self.add_student(person.name, person.age, person.grade)
+        elif isinstance(person, Teacher):
+            self.add_teacher(person.name, person.age, person.subject)
+        else:
+            self.add_person(person.name, person.age)
+
+    # ── Columns ────────────────────────────────────────────────────
+    # NumPy arrays over the same memory as the typed arrays. They're only
+    # used inside an expression: an array can't grow while one is alive.
+    def _column(self, values):
+        return np.frombuffer(values, dtype=np.dtype(values.typecode))
+
+    # ── Queries ────────────────────────────────────────────────────
+    def view(self):
+        return RosterView(self)
+
+    def passing_mask(self, pass_grade=PASS_GRADE):
+        return self.view().passing_mask(pass_grade)
+
+    def passing(self, pass_grade=PASS_GRADE):
+        return self.view().passing(pass_grade)
+
+    def filter(self, **conditions):
+        return self.view().filter(**conditions)
+
+    def where(self, mask):
+        return self.view().where(mask)
+
+    def sort_by(self, column, reverse=False):
+        return self.view().sort_by(column, reverse)
+
+    def __getitem__(self, number):
+        if not 0 <= number < len(self):
+            raise IndexError(number)
+        return PersonView(self, number)
+
+    def __iter__(self):
+        for number in range(len(self)):
+            yield PersonView(self, number)
+
+# ─── Views ────────────────────────────────────────────────────────
+
+class RosterView:
+    # some rows of a roster, in some order; filtering and sorting give
+    # another view, nothing is copied out of the roster until it's read.
+    # rows None is every row in roster order, read without an index.
+    __slots__ = ("roster", "rows")
+
+    def __init__(self, roster, rows=None):
+        self.roster = roster
+        self.rows = rows
+
+    def _rows(self):
+        return np.arange(len(self.roster), dtype=np.intp) if self.rows is None else self.rows
+
+    def __len__(self):
+        return len(self.roster) if self.rows is None else len(self.rows)
+
+    def _values(self, values):
+        column = self.roster._column(values)
+        return column if self.rows is None else column[self.rows]
+
+    def passing_mask(self, pass_grade=PASS_GRADE):
+        # one bool per row: a student at or above pass_grade
+        kinds = self._values(self.roster.kinds)
+        grades = self._values(self.roster.grades)
+        return (kinds == STUDENT) & (grades >= pass_grade)
+
+    def passing(self, pass_grade=PASS_GRADE):
+        return self.where(self.passing_mask(pass_grade))
+
+    def where(self, mask):
+        return RosterView(self.roster, np.flatnonzero(mask) if self.rows is None else self.rows[mask])
+
+    def filter(self, kind=None, min_age=None, max_age=None, min_grade=None, max_grade=None, subject=None):
+        mask = np.ones(len(self), dtype=bool)
+        if kind is not None:
+            mask &= self._values(self.roster.kinds) == kind
+        if min_age is not None or max_age is not None:
+            ages = self._values(self.roster.ages)
+            if min_age is not None:
+                mask &= ages >= min_age
+            if max_age is not None:
+                mask &= ages <= max_age
+        if min_grade is not None or max_grade is not None:
+            grades = self._values(self.roster.grades)
+            mask &= grades != NO_GRADE
+            if min_grade is not None:
+                mask &= grades >= min_grade
+            if max_grade is not None:
+                mask &= grades <= max_grade
+        if subject is not None:
+            code = self.roster.subject_codes.get(subject)
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= self._values(self.roster.subjects) == code
+        return self.where(mask)
+
+    def sort_by(self, column, reverse=False):
+        # stable, so rows that tie keep their current order
+        if column == "name":
+            rows = sorted(self._rows().tolist(), key=self.roster.names.__getitem__, reverse=reverse)
+            return RosterView(self.roster, np.array(rows, dtype=np.intp))
+        if column not in ("age", "grade"):
+            raise ValueError(f"can't sort by {column!r}")
+        values = self._values(getattr(self.roster, column + "s")).astype(np.int32)
+        order = np.argsort(-values if reverse else values, kind="stable")
+        return RosterView(self.roster, order if self.rows is None else self.rows[order])
+
+    def column(self, name):
+        # one column for these rows: a NumPy array for numbers, a list for strings
+        if name == "name":
+            return [self.roster.names[row] for row in self._rows().tolist()]
+        if name == "subject":
+            subjects = self.roster.subject_names
+            return [subjects[code] for code in self._values(self.roster.subjects).tolist()]
+        if name not in COLUMNS:
+            raise ValueError(f"no column {name!r}")
+        return self._values(getattr(self.roster, name + "s")).copy()     # not a view of the roster's memory
+
+    def __getitem__(self, i):
+        # a row as a PersonView, or a slice of the rows as another view
+        if isinstance(i, slice):
+            return RosterView(self.roster, self._rows()[i])
+        if self.rows is None:
+            return self.roster[range(len(self.roster))[i]]
+        return PersonView(self.roster, int(self.rows[i]))
+
+    def __iter__(self):
+        for row in self._rows().tolist():
+            yield PersonView(self.roster, row)
+
+    def introduce(self):
+        for person in self:
+            person.introduce()
+
+class PersonView:
+    # one row of a roster, read on access; behaves like the matching
+    # Person / Student / Teacher without being one
+    __slots__ = ("roster", "number")
+
+    def __init__(self, roster, number):
+        self.roster = roster
+        self.number = number
+
+    @property
+    def kind(self):
+        return self.roster.kinds[self.number]
+
+    @property
+    def name(self):
+        return self.roster.names[self.number]
+
+    @property
+    def age(self):
+        return self.roster.ages[self.number]
+
+    @property
+    def grade(self):
+        grade = self.roster.grades[self.number]
+        return None if grade == NO_GRADE else grade
+
+    @property
+    def subject(self):
+        return self.roster.subject_names[self.roster.subjects[self.number]]
+
+    def is_passing(self, pass_grade=PASS_GRADE):
+        return self.kind == STUDENT and self.roster.grades[self.number] >= pass_grade
+
+    def introduce(self):
+        self.materialize().introduce()
+
+    def materialize(self):
+        # the object this row stands for
+        kind = self.kind
+        if kind == STUDENT:
+            return Student(self.name, self.age, self.grade)
+        if kind == TEACHER:
+            return Teacher(self.name, self.age, self.subject)
+        return Person(self.name, self.age)
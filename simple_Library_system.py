@@ -13,8 +13,92 @@
 #load_from_file(filename) — reads the file and adds books back to the library
 #Replace the text file system in your Library with JSON. JSON is cleaner and handles special characters in titles much better:
 #Upgrade save_to_file and load_from_file to use JSON instead of plain text
+#Scale it to millions of books: slot-based Book, title and author indexes, O(1) borrow/return (see bench_library.py)
+#Stream the file instead: one JSON book per line, read lazily, gzip (.gz) or zstd (.zst) by extension, replaced atomically
+#For fast restarts, save_snapshot writes a binary snapshot that library_snapshot.SnapshotLibrary maps instead of parsing
+#search(query) — every book matching all the words, best first, from an inverted index (main.py uses SQLite FTS5 for the same)
+import gzip
+import heapq
+import io
 import json
+import math
+import os
+import re
+import tempfile
+import unicodedata
+from array import array
+from library_snapshot import replace_file, write_snapshot
+try:
+    import zstandard
+except ImportError:     # optional, only needed for .zst files
+    zstandard = None
+SAVE_BATCH = 10000      # books encoded per write
+TITLE_WEIGHT = 10       # a title word counts ten author words, as in main.py's bm25()
+BM25_K1, BM25_B = 1.2, 0.75
+def search_words(text):
+    # lowercase words with accents stripped, like FTS5's unicode61 tokenizer
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return re.findall(r"\w+", "".join(c for c in text if not unicodedata.combining(c)))
+def _compressed(filename):
+    if filename.endswith(".zst") and zstandard is None:
+        raise RuntimeError("zstandard is not installed: pip install zstandard")
+    return filename.endswith((".gz", ".zst"))
+def _writer(raw, filename):
+    # binary stream over raw that compresses according to the file extension
+    if not _compressed(filename):
+        return raw
+    if filename.endswith(".gz"):
+        return gzip.GzipFile(filename=os.path.basename(filename), mode="wb", fileobj=raw)
+    return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+def _reader(filename):
+    if not _compressed(filename):
+        return open(filename, "rb")
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rb")
+    return zstandard.open(filename, "rb")
+def write_books(books, filename):
+    # NDJSON to a temp file beside filename, renamed over it once complete,
+    # so readers see the old catalog or the new one, never half of one
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".library-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            out = _writer(raw, filename)
+            batch = []
+            for book in books:
+                batch.append(json.dumps({"title": book.title, "author": book.author,
+                                         "is_available": book.is_available}, ensure_ascii=False))
+                if len(batch) == SAVE_BATCH:
+                    out.write(("\n".join(batch) + "\n").encode())
+                    batch = []
+            if batch:
+                out.write(("\n".join(batch) + "\n").encode())
+            if out is not raw:
+                out.close()         # writes the compressed trailer, leaves raw open
+            raw.flush()
+            os.fsync(raw.fileno())
+        replace_file(tmp, filename)     # with the catalog's permissions, not mkstemp's 0600
+    except BaseException:
+        os.unlink(tmp)
+        raise
+def read_books(filename):
+    # yields each Book as its line is parsed; files in the old single JSON
+    # array format are still read, in one go
+    with _reader(filename) as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8")
+        for line in text:
+            if line.startswith("["):
+                items = json.loads(line + text.read())
+            elif line.strip():
+                items = [json.loads(line)]
+            else:
+                continue
+            for item in items:
+                book = Book(item["title"], item["author"])
+                book.is_available = item["is_available"]
+                yield book
 class Book:
+    __slots__ = ("title", "author", "is_available")    # no per-book __dict__
     def __init__(self, title, author):
         self.title = title
         self.author = author
@@ -22,18 +106,57 @@ class Book:
 class Library:
     def __init__(self):
         self.books = []
+        self.by_title = {}      # title -> copies, in the order they were added
+        self.by_author = {}     # author -> books
+        self.postings = {}      # word -> positions in self.books of the books that contain it
+        self.word_count = 0     # words indexed across all books, for the average length
     def add_book(self, book):
+        # the only way books come in, so the indexes always match self.books
+        words = search_words(book.title) + search_words(book.author)
+        for word in set(words):
+            self.postings.setdefault(word, array("I")).append(len(self.books))
+        self.word_count += len(words)
         self.books.append(book)
+        self.by_title.setdefault(book.title, []).append(book)
+        self.by_author.setdefault(book.author, []).append(book)
+    def search(self, query, limit=20, offset=0):
+        # books containing every word of query, ranked by BM25 with title words
+        # weighted up; only the intersection of the postings is scored
+        words = set(search_words(query))
+        postings = sorted((self.postings.get(word, ()) for word in words), key=len)
+        if not postings or not postings[0]:
+            return []
+        matches = set(postings[0]).intersection(*postings[1:])
+        total = len(self.books)
+        average = self.word_count / total
+        # idf as FTS5's bm25() has it, so the two rank alike: a word in over
+        # half the books would go negative and counts (almost) nothing instead
+        idf = {word: max(math.log((total - len(self.postings[word]) + 0.5) / (len(self.postings[word]) + 0.5)),
+                         1e-6)
+               for word in words}
+        def score(position):
+            book = self.books[position]
+            title, author = search_words(book.title), search_words(book.author)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * (len(title) + len(author)) / average)
+            tf = {word: TITLE_WEIGHT * title.count(word) + author.count(word) for word in words}
+            return sum(idf[word] * tf[word] * (BM25_K1 + 1) / (tf[word] + norm) for word in words)
+        best = heapq.nsmallest(offset + limit, matches, key=lambda position: (-score(position), position))
+        return [self.books[position] for position in best[offset:]]
+    def find_book(self, title):
+        copies = self.by_title.get(title)
+        return copies[0] if copies else None
+    def books_by(self, author):
+        return self.by_author.get(author, [])
     def borrow_book(self, title):
-        for book in self.books:
-            if book.title == title and book.is_available:
+        for book in self.by_title.get(title, ()):      # copies of this title only
+            if book.is_available:
                 book.is_available = False
                 print(f"You have borrowed '{book.title}' by {book.author}.")
                 return
         print(f"Sorry, '{title}' is not available.")
     def return_book(self, title):
-        for book in self.books:
-            if book.title == title and not book.is_available:
+        for book in self.by_title.get(title, ()):
+            if not book.is_available:
                 book.is_available = True
                 print(f"You have returned '{book.title}' by {book.author}.")
                 return
@@ -42,13 +165,17 @@ class Library:
         for book in self.books:
             status = "Available" if book.is_available else "Not Available"
             print(f"'{book.title}' by {book.author} - {status}")
+    def save(self, filename):
+        write_books(self.books, filename)
+    def load(self, filename):
+        # lazy: each book is added and yielded as soon as it's read
+        for book in read_books(filename):
+            self.add_book(book)
+            yield book
+    def save_snapshot(self, filename):
+        write_snapshot(self.books, filename)
     def save_json(self, filename):
-        with open(filename, "w") as file:
-            json.dump([{"title": book.title, "author": book.author, "is_available": book.is_available} for book in self.books], file)
+        self.save(filename)
     def load_json(self, filename):
-        with open(filename, "r") as file:
-            data = json.load(file)
-            for item in data:
-                book = Book(item["title"], item["author"])
-                book.is_available = item["is_available"]
-                self.books.append(book)
\ No newline at end of file
+        for _ in self.load(filename):
+            pass
\ No newline at end of file
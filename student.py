@@ -1,4 +1,5 @@
 class Student:
+    __slots__ = ("name", "grade")        # no per-student __dict__
 
     def __init__(self, name, grade):
         # save name and grade to self
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+# ─── Student Cache ────────────────────────────────────────────────
+# Every name-keyed route looks the student up first, so rows are kept in
+# memory by name, least recently used dropped first. A name that isn't in
+# the table is cached too (as None), so repeated lookups of a missing
+# student don't reach the database either. Writes go through the cache
+# right after they commit; the TTL only bounds how stale another worker
+# process's copy can get.
+STUDENT_CACHE_SIZE = int(os.getenv("STUDENT_CACHE_SIZE", 10000))      # names
+STUDENT_CACHE_TTL = int(os.getenv("STUDENT_CACHE_TTL", 300))          # seconds
+
+MISS = object()     # get() result for a name that isn't cached
+
+class StudentCache:
+    def __init__(self, maxsize=STUDENT_CACHE_SIZE, ttl=STUDENT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # name -> (expires at, row or None)
+        self._writes = 0                # bumped by every write, see fill()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        # the cached row, None for a name known not to exist, or MISS
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return MISS
+            if entry[0] <= time.time():
+                del self._entries[name]
+                return MISS
+            self._entries.move_to_end(name)
+            return entry[1]
+
+    def version(self):
+        with self._lock:
+            return self._writes
+
+    def fill(self, name, row, version):
+        # row read after version() returned `version`; if a write landed in
+        # between it may already be stale, so keep it out
+        with self._lock:
+            if version == self._writes:
+                self._store(name, row)
+        return row
+
+    def added(self, row):
+        # row: (id, name, age, grade, course)
+        with self._lock:
+            self._writes += 1
+            self._store(row[1], row)
+
+    def updated(self, name, **changes):
+        # changes: any of age, grade, course
+        with self._lock:
+            self._writes += 1
+            entry = self._entries.get(name)
+            if entry is not None and entry[1] is not None:
+                student_id, _, age, grade, course = entry[1]
+                self._store(name, (student_id, name, changes.get("age", age),
+                                   changes.get("grade", grade), changes.get("course", course)))
+
+    def removed(self, name):
+        with self._lock:
+            self._writes += 1
+            self._store(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+
+    def _store(self, name, row):
+        self._entries[name] = (time.time() + self.ttl, row)
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)   # least recently used
@@ -1,15 +1,57 @@
+import logging
+import os
 import sqlite3
-from fastapi import FastAPI, HTTPException,Depends
+import threading
+from fastapi import FastAPI, HTTPException,Depends, Path, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from typing import List, Literal
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from auth import create_token, verify_token, hash_password, verify_password
+from auth import (
+    create_token, decode_token, hash_password_async, verify_password_async,
+    token_cache, hash_pool, PoolBusy,
+)
+from expense_tracker.http_cache import weak_etag, not_modified, cache_headers
+from expense_tracker.fast_json import RowLayout
+from leaderboard import Leaderboard
+from grade_stats import GradeStats
+from student_cache import StudentCache, MISS
+
+# ─── Row Layouts ──────────────────────────────────────────────────
+
+STUDENT_LAYOUT = RowLayout("id", "name", "age", "grade", "course")
+
+TOP_GRADE = 80              # /students/top lists students at or above it
+TOP_PAGE_SIZE = 100
+MAX_TOP_PAGE_SIZE = 1000
+NEXT_OFFSET_HEADER = "X-Next-Offset"
+log = logging.getLogger("students_api")
+MAX_GRADE_BATCH = 10_000    # items per PUT /students/grades
+LOOKUP_CHUNK = 500          # names per IN (...) lookup, under SQLite's variable limit
 
 # ─── Database Manager ─────────────────────────────────────────────
 
+class DuplicateNames(ValueError):
+    # raised at startup when students.name can't be made unique; nothing is
+    # deleted for the operator, they choose which rows to rename or merge
+    def __init__(self, duplicates):
+        # duplicates: (name, "id,id,...") pairs
+        shown = "; ".join(f"{name!r} (ids {ids})" for name, ids in duplicates[:50])
+        more = ", ..." if len(duplicates) > 50 else ""
+        super().__init__(
+            f"{len(duplicates)} name(s) are shared by more than one student; "
+            f"rename or remove the extra rows and restart. {shown}{more}"
+        )
+        self.duplicates = duplicates
+
 class DatabaseManager:
 
     def __init__(self, db_name="students.db"):
         self.db_name = db_name
+        # one student write at a time, from its statement through to the
+        # in-memory structures, so they apply writes in commit order
+        self.write_lock = threading.Lock()
         self.setup()
 
     def setup(self):
@@ -30,7 +72,58 @@ class DatabaseManager:
                 password TEXT NOT NULL
             )
         """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS versions (
+                resource TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.setup_name_index(conn)
         conn.commit()
+        self.student_cache = StudentCache()
+        # the ranking and statistics queries are served from these; every
+        # student write below updates them once the write has committed,
+        # still holding write_lock
+        self.leaderboard = Leaderboard(self.get_student_rows())
+        with sqlite3.connect(self.db_name) as conn:
+            self.grade_stats = GradeStats(conn.execute(
+                "SELECT course, grade, COUNT(*) FROM students GROUP BY course, grade"
+            ))
+        if self.grade_stats.out_of_range:
+            # rows written before grades were checked; counted at 0 or 100
+            log.warning(
+                "%d student(s) have a grade outside 0-100; /students/stats counts them at the "
+                "nearest end of the range until they're corrected", self.grade_stats.out_of_range
+            )
+
+    def setup_name_index(self, conn):
+        # a name identifies one student: every name-keyed route is an index
+        # seek, and a duplicate insert fails in the database. A table from
+        # before the index that holds duplicates is left as it is.
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'idx_students_name'"
+        ).fetchone():
+            return
+        duplicates = conn.execute(
+            "SELECT name, GROUP_CONCAT(id) FROM students GROUP BY name HAVING COUNT(*) > 1 ORDER BY name"
+        ).fetchall()
+        if duplicates:
+            raise DuplicateNames(duplicates)
+        conn.execute("CREATE UNIQUE INDEX idx_students_name ON students (name)")
+
+    def _bump_version(self, conn):
+        # every write to students moves the collection version on, in the same transaction
+        conn.execute(
+            """INSERT INTO versions (resource, version) VALUES ('students', 1)
+               ON CONFLICT (resource) DO UPDATE SET version = version + 1"""
+        )
+
+    def students_version(self):
+        with sqlite3.connect(self.db_name) as conn:
+            row = conn.execute(
+                "SELECT version FROM versions WHERE resource = 'students'"
+            ).fetchone()
+            return row[0] if row else 0
     def add_user(self, username, hashed_password):
         with sqlite3.connect(self.db_name) as conn:
             conn.execute(
@@ -46,62 +139,129 @@ class DatabaseManager:
             return cursor.fetchone()
 
     def add_student(self, name, age, grade, course):
+        with self.write_lock:
+            with sqlite3.connect(self.db_name) as conn:
+                try:
+                    cursor = conn.execute(
+                        "INSERT INTO students (name, age, grade, course) VALUES (?, ?, ?, ?)",
+                        (name, age, grade, course)
+                    )
+                except sqlite3.IntegrityError:          # name is unique
+                    conn.rollback()
+                    return False
+                self._bump_version(conn)
+                conn.commit()
+            row = (cursor.lastrowid, name, age, grade, course)
+            self.student_cache.added(row)
+            self.leaderboard.put(row)
+            self.grade_stats.add(course, grade)
+            return True
+
+    def get_student_rows(self):                           # tuples in STUDENT_LAYOUT order
         with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "INSERT INTO students (name, age, grade, course) VALUES (?, ?, ?, ?)",
-                (name, age, grade, course)
-            )
-            conn.commit()
+            cursor = conn.execute("SELECT id, name, age, grade, course FROM students")
+            return cursor.fetchall()
 
     def get_all_students(self):
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute("SELECT * FROM students")
-            rows = cursor.fetchall()
-            return [
-                {"id": r[0], "name": r[1], "age": r[2], "grade": r[3], "course": r[4]}
-                for r in rows
-            ]
+        return STUDENT_LAYOUT.objects(self.get_student_rows())
 
     def get_student(self, name):
+        student = self.student_cache.get(name)
+        if student is not MISS:
+            return student
+        version = self.student_cache.version()
         with sqlite3.connect(self.db_name) as conn:
             cursor = conn.execute(
-                "SELECT * FROM students WHERE name = ?", (name,)
+                "SELECT id, name, age, grade, course FROM students WHERE name = ?", (name,)
             )
-            return cursor.fetchone()
+            return self.student_cache.fill(name, cursor.fetchone(), version)
+
+    # the writes below return False when there is no student by that name
 
     def update_student(self, name, age, grade, course):   # ✅ fixed method name
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "UPDATE students SET age = ?, grade = ?, course = ? WHERE name = ?",
-                (age, grade, course, name)
-            )
-            conn.commit()
+        with self.write_lock:
+            old = self.leaderboard.get(name)
+            with sqlite3.connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    "UPDATE students SET age = ?, grade = ?, course = ? WHERE name = ?",
+                    (age, grade, course, name)
+                )
+                if not cursor.rowcount:
+                    return False
+                self._bump_version(conn)
+                conn.commit()
+            self.student_cache.updated(name, age=age, grade=grade, course=course)
+            self.leaderboard.update(name, age=age, grade=grade, course=course)
+            if old:
+                self.grade_stats.move((old[4], old[3]), (course, grade))
+            return True
 
     def update_grade(self, name, grade):                  # ✅ dedicated grade update
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "UPDATE students SET grade = ? WHERE name = ?",
-                (grade, name)
-            )
-            conn.commit()
+        with self.write_lock:
+            old = self.leaderboard.get(name)
+            with sqlite3.connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    "UPDATE students SET grade = ? WHERE name = ?",
+                    (grade, name)
+                )
+                if not cursor.rowcount:
+                    return False
+                self._bump_version(conn)
+                conn.commit()
+            self.student_cache.updated(name, grade=grade)
+            self.leaderboard.update(name, grade=grade)
+            if old:
+                self.grade_stats.move((old[4], old[3]), (old[4], grade))
+            return True
+
+    def update_grades(self, grades):
+        # grades: (name, grade) pairs, applied in order in one transaction;
+        # returns whether each name was found. Any error rolls the whole
+        # batch back.
+        with self.write_lock:
+            names = list({name for name, _ in grades})
+            with sqlite3.connect(self.db_name) as conn:
+                conn.execute("BEGIN IMMEDIATE")        # nobody writes between the lookup and the update
+                found = set()
+                for i in range(0, len(names), LOOKUP_CHUNK):
+                    chunk = names[i:i + LOOKUP_CHUNK]
+                    found.update(row[0] for row in conn.execute(
+                        f"SELECT name FROM students WHERE name IN ({', '.join('?' * len(chunk))})", chunk
+                    ))
+                applied = [(grade, name) for name, grade in grades if name in found]
+                if applied:
+                    conn.executemany("UPDATE students SET grade = ? WHERE name = ?", applied)
+                    self._bump_version(conn)
+                conn.commit()
+            for name, grade in grades:
+                if name in found:
+                    old = self.leaderboard.get(name)
+                    self.student_cache.updated(name, grade=grade)
+                    self.leaderboard.update(name, grade=grade)
+                    if old:
+                        self.grade_stats.move((old[4], old[3]), (old[4], grade))
+            return [name in found for name, _ in grades]
 
     def delete_student(self, name):                       # ✅ only needs name
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "DELETE FROM students WHERE name = ?", (name,)
-            )
-            conn.commit()
-
-    def get_top_students(self):                           # ✅ new method
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute(
-                "SELECT * FROM students WHERE grade >= 80 ORDER BY grade DESC"
-            )
-            rows = cursor.fetchall()
-            return [
-                {"id": r[0], "name": r[1], "age": r[2], "grade": r[3], "course": r[4]}
-                for r in rows
-            ]
+        with self.write_lock:
+            old = self.leaderboard.get(name)
+            with sqlite3.connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    "DELETE FROM students WHERE name = ?", (name,)
+                )
+                if not cursor.rowcount:
+                    return False
+                self._bump_version(conn)
+                conn.commit()
+            self.student_cache.removed(name)
+            self.leaderboard.remove(name)
+            if old:
+                self.grade_stats.remove(old[4], old[3])
+            return True
+
+    def get_top_students(self, limit, offset=0):          # ✅ new method
+        # tuples in STUDENT_LAYOUT order, best grade first, from the leaderboard
+        return self.leaderboard.top(limit, offset, min_grade=TOP_GRADE)
 
 
 # ─── Auth Setup ───────────────────────────────────────────────────
@@ -109,15 +269,27 @@ class DatabaseManager:
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
-    username = verify_token(token)
+    username = token_cache.get(token)   # skip the JWT decode for a known token
+    if username:
+        return username
+    username, expires = decode_token(token) or (None, None)
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token")
+    token_cache.put(token, username, username, expires)
     return username
 
 # ─── FastAPI Setup ────────────────────────────────────────────────
 
 app = FastAPI()
-db = DatabaseManager()
+db = DatabaseManager(os.getenv("STUDENTS_DB", "students.db"))
+
+@app.exception_handler(PoolBusy)
+def hash_pool_busy(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many logins in progress, retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 if not db.get_all_students():
     db.add_student("Alice",   20, 85, "Computer Science")
@@ -137,6 +309,10 @@ class StudentInput(BaseModel):
 class GradeUpdate(BaseModel):
     grade: int
 
+class NamedGrade(BaseModel):
+    name: str
+    grade: int
+
 class UserInput(BaseModel):
     username: str
     password: str
@@ -144,22 +320,26 @@ class UserInput(BaseModel):
 #
 # ─── Auth Endpoints ───────────────────────────────────────────────
 @app.post("/auth/register")
-def register(user: UserInput):
-    existing = db.get_user(user.username)   # ✅ prevent duplicate usernames
+async def register(user: UserInput):       # bcrypt goes to the hashing pool
+    existing = await run_in_threadpool(db.get_user, user.username)   # ✅ prevent duplicate usernames
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
-    hashed_password = hash_password(user.password)
-    db.add_user(user.username, hashed_password)
+    hashed_password = await hash_password_async(user.password)
+    await run_in_threadpool(db.add_user, user.username, hashed_password)
     return {"message": f"User '{user.username}' registered successfully!"}
 
 @app.post("/auth/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = db.get_user(form_data.username)
-    if not user or not verify_password(form_data.password, user[2]):  # user[2] is password
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await run_in_threadpool(db.get_user, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user[2]):  # user[2] is password
         raise HTTPException(status_code=401, detail="Invalid username or password")
     token = create_token(form_data.username)
     return {"access_token": token, "token_type": "bearer"}
 
+@app.get("/metrics")
+def metrics():
+    return {"password_hashing": hash_pool.stats()}
+
 
 # ─── Endpoints ────────────────────────────────────────────────────
 
@@ -169,15 +349,50 @@ def home():
     return {"message": "Welcome to the Student Management API!"}
 
 @app.get("/students")
-def get_all_students():
-    return db.get_all_students()
+def get_all_students(request: Request):
+    etag = weak_etag("students", db.students_version())
+    unchanged = not_modified(request, etag)     # 304 without reading a student
+    if unchanged:
+        return unchanged
+    # encoded straight from the rows with orjson, no jsonable_encoder pass
+    return STUDENT_LAYOUT.response(db.get_student_rows(), headers=cache_headers(etag))
 
 @app.get("/students/top")                                 # ✅ added missing endpoint
-def get_top_students():
-    top = db.get_top_students()
-    if not top:
+def get_top_students(
+    limit: int = Query(TOP_PAGE_SIZE, ge=1, le=MAX_TOP_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    top = db.get_top_students(limit + 1, offset)          # one extra row means there's more
+    if not top and not offset:
         raise HTTPException(status_code=404, detail="No top students found")
-    return top
+    headers = {}
+    if len(top) > limit:
+        top = top[:limit]
+        headers[NEXT_OFFSET_HEADER] = str(offset + limit)
+    return STUDENT_LAYOUT.response(top, headers=headers)
+
+# declared before /students/{name}/... routes could shadow them
+
+@app.get("/students/{name}/rank")
+def get_student_rank(name: str):
+    ranking = db.leaderboard.rank(name)
+    if not ranking:
+        raise HTTPException(status_code=404, detail="Student not found")
+    rank, total, percentile = ranking
+    return {"name": name, "rank": rank, "of": total, "percentile": percentile}
+
+@app.get("/students/percentile/{p}")
+def get_grade_percentile(p: float = Path(gt=0, le=100)):
+    # the student at the p-th percentile of grades (nearest rank)
+    student = db.leaderboard.percentile(p)
+    if not student:
+        raise HTTPException(status_code=404, detail="No students found")
+    return {"percentile": p, "student": STUDENT_LAYOUT.objects([student])[0]}
+
+@app.get("/students/stats")
+def get_grade_stats(by: Literal["course"] = "course"):
+    # count, mean, median, stddev, percentiles and a histogram per course
+    return db.grade_stats.by_course()
 
 @app.get("/students/{name}")                              # ✅ added missing endpoint
 def get_student(name: str):
@@ -189,35 +404,49 @@ def get_student(name: str):
 
 @app.post("/students")
 def create_student(student: StudentInput, current_user: str = Depends(get_current_user)):
-    existing = db.get_student(student.name)
-    if existing:                                          # ✅ prevent duplicates
-        raise HTTPException(status_code=400, detail="Student already exists")
-    db.add_student(student.name, student.age, student.grade, student.course)
+    if student.grade < 0 or student.grade > 100:
+        raise HTTPException(status_code=400, detail="Grade must be between 0 and 100")
+    if not db.add_student(student.name, student.age, student.grade, student.course):
+        raise HTTPException(status_code=400, detail="Student already exists")  # ✅ name is unique
     return {"message": f"Student '{student.name}' added successfully!"}
 
+@app.put("/students/grades")
+def update_grades(grades: List[NamedGrade], current_user: str = Depends(get_current_user)):
+    # a term's grades in one request: nothing is written unless every grade
+    # is valid, and then all of them are written in one transaction
+    if len(grades) > MAX_GRADE_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_GRADE_BATCH} grades per batch")
+    invalid = [{"index": i, "name": item.name, "grade": item.grade}
+               for i, item in enumerate(grades) if item.grade < 0 or item.grade > 100]
+    if invalid:
+        raise HTTPException(status_code=400, detail={
+            "message": "Grade must be between 0 and 100", "invalid": invalid})
+    found = db.update_grades([(item.name, item.grade) for item in grades])
+    results = [{"name": item.name, "grade": item.grade, "status": "updated" if ok else "not_found"}
+               for item, ok in zip(grades, found)]
+    return {"updated": sum(found), "not_found": len(found) - sum(found), "results": results}
+
+# update and delete try the change first; a student that isn't there is a
+# write that changed no rows, so there's no lookup before it
 
 @app.put("/students/{name}")
 def update_student(name: str, student: StudentInput, current_user: str = Depends(get_current_user)):
-    existing = db.get_student(name)
-    if not existing:
+    if student.grade < 0 or student.grade > 100:
+        raise HTTPException(status_code=400, detail="Grade must be between 0 and 100")
+    if not db.update_student(name, student.age, student.grade, student.course):
         raise HTTPException(status_code=404, detail="Student not found")
-    db.update_student(name, student.age, student.grade, student.course)
     return {"message": f"Student '{name}' updated successfully!"}
 
 @app.put("/students/{name}/grade")
 def update_grade(name: str, grade_update: GradeUpdate, current_user: str = Depends(get_current_user)):
-    existing = db.get_student(name)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Student not found")
     if grade_update.grade < 0 or grade_update.grade > 100:  # ✅ validate grade range
         raise HTTPException(status_code=400, detail="Grade must be between 0 and 100")
-    db.update_grade(name, grade_update.grade)
+    if not db.update_grade(name, grade_update.grade):
+        raise HTTPException(status_code=404, detail="Student not found")
     return {"message": f"Grade updated to {grade_update.grade} for '{name}'"}
 
 @app.delete("/students/{name}")
 def delete_student(name: str, current_user: str = Depends(get_current_user)):                            # ✅ no body needed
-    existing = db.get_student(name)
-    if not existing:
+    if not db.delete_student(name):
         raise HTTPException(status_code=404, detail="Student not found")
-    db.delete_student(name)
     return {"message": f"Student '{name}' deleted successfully!"}
\ No newline at end of file
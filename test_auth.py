@@ -0,0 +1,55 @@
+import asyncio
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+from auth import HashPool, PoolBusy
+
+# ─── Auth Tests ───────────────────────────────────────────────────
+# The hashing pool's limits, its recovery when a worker process dies and
+# the stats it reports.
+#
+#   pytest test_auth.py        or        python test_auth.py
+
+def run(pool, fn, *args):
+    return asyncio.run(pool.run(fn, *args))
+
+def test_pool_replaces_a_broken_executor():
+    pool = HashPool(workers=2, queue_limit=4)
+    try:
+        assert run(pool, pow, 2, 10) == 1024
+        for process in list(pool._executor._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)    # every worker dies between calls
+        assert run(pool, pow, 3, 3) == 27           # retried on a new executor
+        try:
+            run(pool, os._exit, 1)                  # dies on every attempt
+        except BrokenProcessPool:
+            pass
+        else:
+            raise AssertionError("expected BrokenProcessPool")
+        assert run(pool, pow, 2, 5) == 32           # and the pool still works after that
+        stats = pool.stats()
+        assert (stats["completed"], stats["failed"], stats["in_flight"]) == (3, 1, 0)
+    finally:
+        pool.shutdown()
+
+def test_pool_refuses_work_past_its_queue():
+    pool = HashPool(workers=1, queue_limit=1)
+
+    async def burst():
+        return await asyncio.gather(*(pool.run(pow, 2, i) for i in range(4)), return_exceptions=True)
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        pool.shutdown()
+    assert results[:2] == [1, 2]
+    assert all(isinstance(result, PoolBusy) for result in results[2:])
+    assert pool.stats()["rejected"] == 2
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("auth ✅")
@@ -0,0 +1,95 @@
+import numpy as np
+
+from grade_stats import GradeStats, PERCENTILES
+
+# ─── Grade Statistics Tests ───────────────────────────────────────
+# Every statistic checked against NumPy over the plain list of grades,
+# before and after writes, and grades outside 0-100 counted in the same
+# cell on every path.
+#
+#   pytest test_grade_stats.py        or        python test_grade_stats.py
+
+GRADES = {
+    "CS": [85, 91, 95, 60, 60, 100, 0],
+    "Math": [45],
+    "Physics": [78, 82],
+}
+
+def rows(grades):
+    # (course, grade, count), as the GROUP BY in students_api
+    counted = {}
+    for course, values in grades.items():
+        for grade in values:
+            counted[course, grade] = counted.get((course, grade), 0) + 1
+    return [(course, grade, n) for (course, grade), n in counted.items()]
+
+def expected(values):
+    values = np.array(values)
+    return {
+        "count": len(values),
+        "mean": round(float(values.mean()), 2),
+        "median": float(np.percentile(values, 50)),
+        "stddev": round(float(values.std()), 2),
+        "percentiles": {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES},
+    }
+
+def check(stats, grades):
+    result = stats.by_course()
+    for course, values in grades.items():
+        got = dict(result["courses"][course])
+        got.pop("histogram")
+        assert got == expected(values), course
+    overall = dict(result["overall"])
+    overall.pop("histogram")
+    assert overall == expected([grade for values in grades.values() for grade in values])
+    assert set(result["courses"]) == {course for course, values in grades.items() if values}
+
+def test_statistics_match_numpy():
+    check(GradeStats(rows(GRADES)), GRADES)
+
+def test_histogram_puts_100_in_the_last_bin():
+    histogram = GradeStats(rows(GRADES)).by_course()["courses"]["CS"]["histogram"]
+    assert histogram["0-9"] == 1
+    assert histogram["60-69"] == 2
+    assert histogram["90-100"] == 3                 # 91, 95, 100
+    assert sum(histogram.values()) == len(GRADES["CS"])
+    assert list(histogram)[-1] == "90-100"
+
+def test_writes_keep_statistics_current():
+    stats = GradeStats(rows(GRADES))
+    stats.by_course()                               # cached, must not be served stale
+    grades = {course: list(values) for course, values in GRADES.items()}
+    stats.add("Biology", 70)
+    grades["Biology"] = [70]
+    stats.move(("CS", 85), ("Math", 50))
+    grades["CS"].remove(85)
+    grades["Math"].append(50)
+    stats.move(("Physics", 78), ("Physics", 99))
+    grades["Physics"] = [99, 82]
+    stats.remove("Math", 45)
+    grades["Math"].remove(45)
+    check(stats, grades)
+    stats.remove("Biology", 70)
+    del grades["Biology"]
+    check(stats, grades)                            # an emptied course drops out
+
+def test_grades_outside_the_range_count_at_the_nearest_end():
+    # legacy rows from before grades were checked: loaded, moved and removed
+    # through the same cell, never an IndexError and never a wrapped index
+    stats = GradeStats([("CS", 150, 1), ("CS", -5, 2), ("CS", 80, 1)])
+    assert stats.out_of_range == 3
+    check(stats, {"CS": [100, 0, 0, 80]})
+    stats.move(("CS", 150), ("CS", 90))
+    stats.move(("CS", -5), ("CS", 40))
+    check(stats, {"CS": [90, 40, 0, 80]})
+    stats.remove("CS", -5)
+    stats.add("CS", 101)
+    check(stats, {"CS": [90, 40, 80, 100]})
+    assert (stats.counts >= 0).all()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("grade_stats ✅")
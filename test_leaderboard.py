@@ -0,0 +1,92 @@
+import sys
+import threading
+
+from leaderboard import Leaderboard
+
+# ─── Leaderboard Tests ────────────────────────────────────────────
+# Ranks, pages and percentiles against answers worked out by hand, and
+# concurrent updates of one student keeping every field.
+#
+#   pytest test_leaderboard.py        or        python test_leaderboard.py
+
+ROWS = [
+    (1, "Alice", 20, 85, "CS"),
+    (2, "Bob", 22, 45, "Math"),
+    (3, "Charlie", 21, 91, "CS"),
+    (4, "Diana", 23, 85, "Physics"),
+    (5, "Eve", 20, 95, "CS"),
+]
+
+def names(rows):
+    return [row[1] for row in rows]
+
+def test_order_is_best_grade_first_ties_by_name():
+    board = Leaderboard(ROWS)
+    assert names(board.top(10)) == ["Eve", "Charlie", "Alice", "Diana", "Bob"]
+    assert names(board.top(2, offset=2)) == ["Alice", "Diana"]
+    assert names(board.top(10, min_grade=85)) == ["Eve", "Charlie", "Alice", "Diana"]
+    assert names(board.top(10, offset=3, min_grade=85)) == ["Diana"]
+    assert board.count_at_least(85) == 4
+    assert board.count_at_least(96) == 0
+
+def test_rank_shares_the_best_rank_on_ties():
+    board = Leaderboard(ROWS)
+    assert board.rank("Eve") == (1, 5, 100.0)
+    assert board.rank("Alice") == (3, 5, 60.0)      # 3 of 5 score 85 or below
+    assert board.rank("Diana") == (3, 5, 60.0)
+    assert board.rank("Bob") == (5, 5, 20.0)
+    assert board.rank("Nobody") is None
+
+def test_percentile_is_nearest_rank():
+    board = Leaderboard(ROWS)                       # grades 45 85 85 91 95
+    assert board.percentile(20)[1] == "Bob"         # ceil(0.2 * 5) = 1st lowest
+    assert board.percentile(21)[3] == 85            # 2nd lowest
+    assert board.percentile(60)[3] == 85
+    assert board.percentile(61)[1] == "Charlie"
+    assert board.percentile(100)[1] == "Eve"
+    assert Leaderboard().percentile(50) is None
+
+def test_writes_move_students():
+    board = Leaderboard(ROWS)
+    board.update("Bob", grade=99)
+    board.put((6, "Frank", 19, 85, "Math"))
+    board.remove("Eve")
+    assert names(board.top(10)) == ["Bob", "Charlie", "Alice", "Diana", "Frank"]
+    assert board.get("Bob") == (2, "Bob", 22, 99, "Math")
+    assert board.rank("Frank") == (3, 5, 60.0)
+    assert len(board) == 5
+
+def test_concurrent_updates_keep_every_field():
+    # one thread only changes the grade, the other only the course; neither
+    # may write back the other's field as it was before
+    board = Leaderboard(ROWS)
+    rounds = 2000
+
+    def grades():
+        for i in range(rounds):
+            board.update("Alice", grade=i % 101)
+
+    def courses():
+        for i in range(rounds):
+            board.update("Alice", course=f"Course {i}")
+
+    threads = [threading.Thread(target=grades), threading.Thread(target=courses)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)                     # switch threads as often as possible
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert board.get("Alice") == (1, "Alice", 20, (rounds - 1) % 101, f"Course {rounds - 1}")
+    assert len(board.keys) == len(board.scores) == len(ROWS)
+    assert board.keys == sorted(board.keys)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("leaderboard ✅")
@@ -0,0 +1,131 @@
+import contextlib
+import io
+import os
+import random
+import stat
+import tempfile
+import uuid
+
+from simple_Library_system import Book, Library
+from library_snapshot import SnapshotLibrary
+
+# ─── Library Tests ────────────────────────────────────────────────
+# The in-memory Library against the linear scans it replaced, and the
+# files it saves: catalogs and snapshots replaced atomically without
+# changing the file's permissions.
+#
+#   pytest test_library.py        or        python test_library.py
+
+TMP = tempfile.mkdtemp()
+
+def path(suffix):
+    return os.path.join(TMP, uuid.uuid4().hex + suffix)
+
+def catalog():
+    library = Library()
+    for title, author in (("Dune", "Frank Herbert"), ("Emma", "Jane Austen"), ("Persuasion", "Jane Austen")):
+        library.add_book(Book(title, author))
+    return library
+
+def mode(filename):
+    return stat.S_IMODE(os.stat(filename).st_mode)
+
+def umask_default():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+# ─── Indexes ──────────────────────────────────────────────────────
+
+def scan_borrow(books, title):
+    # borrow_book as it was before the title index: the first available copy
+    for book in books:
+        if book.title == title and book.is_available:
+            book.is_available = False
+            print(f"You have borrowed '{book.title}' by {book.author}.")
+            return
+    print(f"Sorry, '{title}' is not available.")
+
+def scan_return(books, title):
+    for book in books:
+        if book.title == title and not book.is_available:
+            book.is_available = True
+            print(f"You have returned '{book.title}' by {book.author}.")
+            return
+    print(f"Sorry, '{title}' was not borrowed.")
+
+def test_indexes_match_a_scan_of_the_books():
+    # copies of a title by different authors, borrowed and returned at random
+    rng = random.Random(3)
+    titles = [f"Title {i}" for i in range(30)]
+    authors = [f"Author {i}" for i in range(8)]
+    library, scanned = Library(), []
+    for _ in range(200):
+        title, author = rng.choice(titles), rng.choice(authors)
+        library.add_book(Book(title, author))
+        scanned.append(Book(title, author))
+    for _ in range(1000):
+        title = rng.choice(titles + ["Missing"])
+        indexed, scan = io.StringIO(), io.StringIO()
+        operation = rng.choice(["borrow", "return"])
+        with contextlib.redirect_stdout(indexed):
+            getattr(library, operation + "_book")(title)
+        with contextlib.redirect_stdout(scan):
+            (scan_borrow if operation == "borrow" else scan_return)(scanned, title)
+        assert indexed.getvalue() == scan.getvalue()
+    assert [(b.title, b.author, b.is_available) for b in library.books] == \
+        [(b.title, b.author, b.is_available) for b in scanned]
+    for title in titles:
+        assert library.by_title.get(title, []) == [b for b in library.books if b.title == title]
+        found = library.find_book(title)
+        assert found is next((b for b in library.books if b.title == title), None)
+    for author in authors:
+        assert library.books_by(author) == [b for b in library.books if b.author == author]
+    assert library.find_book("Missing") is None and library.books_by("Nobody") == []
+
+def test_book_has_no_dict():
+    book = Book("Dune", "Frank Herbert")
+    assert not hasattr(book, "__dict__")
+    try:
+        book.pages = 412
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("expected AttributeError")
+
+# ─── Catalog Files ────────────────────────────────────────────────
+
+def test_save_keeps_the_file_mode():
+    for suffix in (".ndjson", ".gz"):
+        library, filename = catalog(), path(suffix)
+        library.save(filename)
+        assert mode(filename) == umask_default()
+        os.chmod(filename, 0o640)
+        library.books[0].is_available = False
+        library.save(filename)
+        assert mode(filename) == 0o640
+        loaded = Library()
+        loaded.load_json(filename)
+        assert [(b.title, b.author, b.is_available) for b in loaded.books] == \
+            [(b.title, b.author, b.is_available) for b in library.books]
+    assert [name for name in os.listdir(TMP) if name.startswith(".library-")] == []
+
+# ─── Snapshots ────────────────────────────────────────────────────
+
+def test_snapshot_keeps_the_file_mode():
+    library, filename = catalog(), path(".snap")
+    library.save_snapshot(filename)
+    assert mode(filename) == umask_default()         # a new file: as open() would make it
+    os.chmod(filename, 0o640)
+    library.save_snapshot(filename)
+    assert mode(filename) == 0o640                   # replaced, permissions kept
+    snapshot = SnapshotLibrary(filename)
+    assert len(snapshot) == 3
+    assert [name for name in os.listdir(TMP) if name.startswith(".snapshot-")] == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("library ✅")
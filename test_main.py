@@ -0,0 +1,164 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import uuid
+
+TMP = tempfile.mkdtemp()
+os.environ["LIBRARY_DB"] = os.path.join(TMP, "library.db")
+
+import main
+from fastapi.testclient import TestClient
+from simple_Library_system import Book, Library
+
+# ─── Library API Tests ────────────────────────────────────────────
+# Borrow, return and delete as single conditional UPDATEs and the 404/400
+# each failure gets, the unique title index, and /books/search kept in
+# step with every write by the FTS5 triggers and ranked like the in-memory
+# Library.search over the same catalog.
+#
+#   pytest test_main.py        or        python test_main.py
+
+def fresh_db():
+    return main.DatabaseManager(os.path.join(TMP, f"{uuid.uuid4().hex}.db"))
+
+def client(db):
+    main.db = db
+    return TestClient(main.app)
+
+def search(api, q, **params):
+    response = api.get("/books/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [book["title"] for book in response.json()], response.headers.get(main.NEXT_OFFSET_HEADER)
+
+def status(response):
+    return response.status_code, response.json().get("detail")
+
+# ─── Borrow, Return, Delete ───────────────────────────────────────
+
+def test_each_outcome_of_borrow_return_delete():
+    api = client(fresh_db())
+    assert status(api.post("/books", json={"title": "Dune", "author": "Frank Herbert"}))[0] == 200
+    assert status(api.post("/books", json={"title": "Dune", "author": "Someone Else"})) == \
+        (400, "Book already exists")
+    assert status(api.put("/books/Dune/return")) == (400, "Book was not borrowed")
+    assert status(api.put("/books/Dune/borrow"))[0] == 200
+    assert status(api.put("/books/Dune/borrow")) == (400, "Book already borrowed")
+    assert status(api.delete("/books/Dune")) == (400, "Cannot delete a borrowed book")
+    assert api.get("/books").json() == [
+        {"id": 1, "title": "Dune", "author": "Frank Herbert", "is_available": False}]
+    assert status(api.put("/books/Dune/return"))[0] == 200
+    assert status(api.delete("/books/Dune"))[0] == 200
+    for response in (api.put("/books/Dune/borrow"), api.put("/books/Dune/return"), api.delete("/books/Dune")):
+        assert status(response) == (404, "Book not found")
+    assert api.get("/books").json() == []
+
+def test_one_of_many_borrowers_wins():
+    db = fresh_db()
+    db.add_book("Dune", "Frank Herbert")
+    start, results = threading.Barrier(8), []
+
+    def borrow():
+        start.wait()
+        results.append(db.update_availability("Dune", False))
+
+    threads = [threading.Thread(target=borrow) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False] * 7 + [True]
+
+def test_duplicate_titles_are_reported_not_deleted():
+    path = os.path.join(TMP, f"{uuid.uuid4().hex}.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                     "author TEXT NOT NULL, is_available INTEGER DEFAULT 1)")
+        conn.executemany("INSERT INTO books (title, author) VALUES (?, ?)",
+                         [("Dune", "Frank Herbert"), ("Emma", "Jane Austen"), ("Dune", "Frank Herbert")])
+    try:
+        main.DatabaseManager(path)
+    except main.DuplicateTitles as exc:
+        assert exc.duplicates == [("Dune", "1,3")]
+    else:
+        raise AssertionError("expected DuplicateTitles")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM books").fetchone()[0] == 3
+        conn.execute("UPDATE books SET title = 'Dune (2)' WHERE id = 3")
+    db = main.DatabaseManager(path)                 # starts once the operator renames a copy
+    assert db.add_book("Emma", "Jane Austen") is False
+
+# ─── Search ───────────────────────────────────────────────────────
+
+def test_search_follows_writes():
+    db = fresh_db()
+    api = client(db)
+    for title, author in (("Clean Code", "Robert Martin"), ("Clean Architecture", "Robert Martin"),
+                          ("Dune", "Frank Herbert"), ("Les Misérables", "Victor Hugo")):
+        assert api.post("/books", json={"title": title, "author": author}).status_code == 200
+    assert search(api, "clean")[0] == ["Clean Code", "Clean Architecture"]
+    assert search(api, "robert code")[0] == ["Clean Code"]          # every word must match
+    assert search(api, "MISERABLES")[0] == ["Les Misérables"]       # case and accents folded
+    assert search(api, 'clean OR "dune')[0] == []                   # operators are words
+    assert search(api, "  ")[0] == []
+    with sqlite3.connect(db.db_name) as conn:
+        conn.execute("UPDATE books SET title = 'Tidy Code' WHERE title = 'Clean Code'")
+    assert search(api, "clean")[0] == ["Clean Architecture"]
+    assert search(api, "tidy")[0] == ["Tidy Code"]
+    assert api.delete("/books/Clean Architecture").status_code == 200
+    assert search(api, "clean")[0] == []
+    assert search(api, "robert")[0] == ["Tidy Code"]
+
+def test_title_words_rank_first():
+    api = client(fresh_db())
+    api.post("/books", json={"title": "A Memoir", "author": "Frank Herbert"})
+    api.post("/books", json={"title": "Herbert's Garden", "author": "Ann Lee"})
+    assert search(api, "herbert")[0] == ["Herbert's Garden", "A Memoir"]
+
+def test_search_pages():
+    api = client(fresh_db())
+    for i in range(25):
+        api.post("/books", json={"title": f"Python {i}", "author": "Author"})
+    everything, more = search(api, "python", limit=100)
+    assert len(everything) == 25 and more is None
+    pages, offset = [], 0
+    while offset is not None:
+        page, more = search(api, "python", limit=10, offset=offset)
+        pages += page
+        offset = int(more) if more else None
+    assert pages == everything
+    assert api.get("/books/search", params={"q": "python", "limit": 0}).status_code == 422
+
+def test_catalog_from_before_search_is_indexed():
+    path = os.path.join(TMP, f"{uuid.uuid4().hex}.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                     "author TEXT NOT NULL, is_available INTEGER DEFAULT 1)")
+        conn.execute("INSERT INTO books (title, author) VALUES ('Dune', 'Frank Herbert')")
+    db = main.DatabaseManager(path)
+    assert [row[1] for row in db.search_books("herbert", 10)] == ["Dune"]
+
+def test_library_search_ranks_like_sqlite():
+    # one catalog in both, queries of one to three words, every page
+    rng = random.Random(5)
+    words = "python code clean data science deep learning guide practical modern art war peace history".split()
+    authors = ["Eric Matthes", "Robert Martin", "David Thomas", "Guido Python", "Ann Clean", "Zoë Data"]
+    db, library = fresh_db(), Library()
+    for i in range(400):
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 5))) + f" {i}"
+        author = rng.choice(authors)
+        db.add_book(title, author)
+        library.add_book(Book(title, author))
+    queries = words + ["zoe", "python clean", "deep learning guide", "art war", "history python data", "nothing"]
+    for query in queries:
+        for offset in (0, 7):
+            assert [row[1] for row in db.search_books(query, 30, offset)] == \
+                [book.title for book in library.search(query, 30, offset)], query
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("main ✅")
@@ -0,0 +1,144 @@
+import contextlib
+import io
+import random
+
+from person import Person, Student, Teacher
+from roster import Roster, PERSON, STUDENT, TEACHER
+
+# ─── Roster Tests ─────────────────────────────────────────────────
+# Every Roster query checked against the same question asked of a list of
+# Person / Student / Teacher objects, row for row and in the same order,
+# and rows that can't be stored refused without touching the columns.
+#
+#   pytest test_roster.py        or        python test_roster.py
+
+KINDS = {PERSON: Person, STUDENT: Student, TEACHER: Teacher}
+
+def people(n=500, seed=7):
+    # ties on every sort key, so stability shows
+    rng = random.Random(seed)
+    result = []
+    for _ in range(n):
+        name = rng.choice(["Alice", "Bob", "Charlie", "Diana", "Eve"]) + f" {rng.randint(0, 20)}"
+        age = rng.randint(17, 40)
+        kind = rng.random()
+        if kind < 0.7:
+            result.append(Student(name, age, rng.randint(0, 100)))
+        elif kind < 0.85:
+            result.append(Teacher(name, age, rng.choice(["Math", "Physics", "History"])))
+        else:
+            result.append(Person(name, age))
+    return result
+
+def fields(person):
+    # what a Person, Student, Teacher or PersonView says about itself
+    return (type(person).__name__, person.name, person.age,
+            getattr(person, "grade", None), getattr(person, "subject", None))
+
+def same(view, objects):
+    return [fields(person.materialize()) for person in view] == [fields(person) for person in objects]
+
+def passing(person):
+    return isinstance(person, Student) and person.grade >= 50
+
+def test_passing_matches_is_passing():
+    objects = people()
+    roster = Roster(objects)
+    assert roster.passing_mask().tolist() == [passing(person) for person in objects]
+    assert same(roster.passing(), [person for person in objects if passing(person)])
+    assert same(roster.passing(80), [person for person in objects
+                                     if isinstance(person, Student) and person.grade >= 80])
+    assert [person.is_passing() for person in roster] == [passing(person) for person in objects]
+
+def test_filter_matches_list_comprehensions():
+    objects = people()
+    roster = Roster(objects)
+    for kind, cls in KINDS.items():
+        assert same(roster.filter(kind=kind), [person for person in objects if type(person) is cls])
+    assert same(roster.filter(min_age=20, max_age=25), [person for person in objects if 20 <= person.age <= 25])
+    assert same(roster.filter(min_grade=40, max_grade=60), [
+        person for person in objects if isinstance(person, Student) and 40 <= person.grade <= 60])
+    assert same(roster.filter(subject="Math"), [
+        person for person in objects if isinstance(person, Teacher) and person.subject == "Math"])
+    assert len(roster.filter(subject="Latin")) == 0
+    # filters of filters, and of a sorted view
+    assert same(roster.filter(kind=STUDENT).filter(min_age=30).passing(), [
+        person for person in objects if passing(person) and person.age >= 30])
+    assert same(roster.sort_by("age").filter(kind=TEACHER), sorted(
+        [person for person in objects if isinstance(person, Teacher)], key=lambda person: person.age))
+
+def test_sort_by_is_stable_like_sorted():
+    objects = people()
+    roster = Roster(objects)
+    students = [person for person in objects if isinstance(person, Student)]
+    for column in ("name", "age"):
+        for reverse in (False, True):
+            key = lambda person: getattr(person, column)
+            assert same(roster.sort_by(column, reverse), sorted(objects, key=key, reverse=reverse))
+    for reverse in (False, True):
+        assert same(roster.filter(kind=STUDENT).sort_by("grade", reverse),
+                    sorted(students, key=lambda person: person.grade, reverse=reverse))
+    # sorting a sorted view: ties keep the first order
+    assert same(roster.sort_by("name").sort_by("age"),
+                sorted(sorted(objects, key=lambda person: person.name), key=lambda person: person.age))
+
+def test_indexing_and_slicing_match_a_list():
+    objects = people(50)
+    roster = Roster(objects)
+    for view, expected in ((roster.view(), objects),
+                           (roster.sort_by("age", reverse=True),
+                            sorted(objects, key=lambda person: person.age, reverse=True))):
+        for i in (0, 7, -1, -len(objects)):
+            assert fields(view[i].materialize()) == fields(expected[i])
+        for part in (slice(5, 15), slice(None, None, -3), slice(40, 100), slice(10, 5)):
+            assert same(view[part], expected[part])
+        assert same(view[10:30].filter(kind=STUDENT)[::2],
+                    [person for person in expected[10:30] if isinstance(person, Student)][::2])
+    try:
+        roster.view()[len(objects)]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("expected IndexError")
+
+def test_columns_and_introduce():
+    objects = people(50)
+    roster = Roster(objects)
+    teachers = roster.filter(kind=TEACHER)
+    assert teachers.column("name") == [person.name for person in objects if isinstance(person, Teacher)]
+    assert teachers.column("subject") == [person.subject for person in objects if isinstance(person, Teacher)]
+    ages = roster.view().column("age")
+    assert ages.tolist() == [person.age for person in objects]
+    ages[:] = 0                                     # a copy, the roster is untouched
+    assert roster[0].age == objects[0].age
+    printed, expected = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(printed):
+        roster.view()[:10].introduce()
+    with contextlib.redirect_stdout(expected):
+        for person in objects[:10]:
+            person.introduce()
+    assert printed.getvalue() == expected.getvalue()
+
+def test_rejected_row_leaves_the_roster_as_it_was():
+    roster = Roster([Student("Alice", 20, 60)])
+    for add in (lambda: roster.add_student("Bob", 20, 72.5), lambda: roster.add_student("Bob", -1, 50),
+                lambda: roster.add_student("Bob", 20, 40000), lambda: roster.add_teacher("Bob", 70000, "Math"),
+                lambda: roster.add_person(None, 30)):
+        try:
+            add()
+        except (ValueError, TypeError):
+            pass
+        else:
+            raise AssertionError("expected the row to be refused")
+        assert len(roster.kinds) == len(roster.ages) == len(roster.grades) == len(roster.subjects) == len(roster) == 1
+    roster.append(Student("Carol", 21.0, None))     # no grade yet; whole floats are whole numbers
+    roster.add_student("Dan", 22, 71.0)
+    assert same(roster.view(), [Student("Alice", 20, 60), Student("Carol", 21, None), Student("Dan", 22, 71)])
+    assert roster.passing_mask().tolist() == [True, False, True]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("roster ✅")
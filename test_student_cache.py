@@ -0,0 +1,69 @@
+import time
+
+from student_cache import StudentCache, MISS
+
+# ─── Student Cache Tests ──────────────────────────────────────────
+# Hits, misses and known-missing names, eviction and expiry, and the
+# write counter that keeps a read which raced a write out of the cache.
+#
+#   pytest test_student_cache.py        or        python test_student_cache.py
+
+ALICE = (1, "Alice", 20, 85, "CS")
+
+def test_missing_names_are_cached_as_none():
+    cache = StudentCache()
+    assert cache.get("Nobody") is MISS
+    assert cache.fill("Nobody", None, cache.version()) is None
+    assert cache.get("Nobody") is None              # known missing, not MISS
+    cache.added((2, "Nobody", 30, 70, "Math"))
+    assert cache.get("Nobody") == (2, "Nobody", 30, 70, "Math")
+
+def test_writes_go_through_the_cache():
+    cache = StudentCache()
+    cache.fill("Alice", ALICE, cache.version())
+    cache.updated("Alice", grade=90)
+    assert cache.get("Alice") == (1, "Alice", 20, 90, "CS")
+    cache.updated("Alice", age=21, course="Math")
+    assert cache.get("Alice") == (1, "Alice", 21, 90, "Math")
+    cache.updated("Bob", grade=50)                  # not cached: stays a miss
+    assert cache.get("Bob") is MISS
+    cache.removed("Alice")
+    assert cache.get("Alice") is None
+
+def test_fill_after_a_write_is_refused():
+    # a reader takes the version, reads the row, and a write commits before
+    # it fills; the row it read may be the old one, so it mustn't be cached
+    cache = StudentCache()
+    version = cache.version()
+    stale = ALICE                                   # read before the write
+    cache.updated("Alice", grade=90)                # not cached, nothing to update
+    assert cache.fill("Alice", stale, version) == stale     # still returned to its caller
+    assert cache.get("Alice") is MISS
+    cache.removed("Bob")
+    cache.fill("Bob", (2, "Bob", 22, 45, "Math"), version)  # read before Bob was deleted
+    assert cache.get("Bob") is None
+    cache.fill("Alice", (1, "Alice", 20, 90, "CS"), cache.version())
+    assert cache.get("Alice") == (1, "Alice", 20, 90, "CS")
+
+def test_least_recently_used_goes_first():
+    cache = StudentCache(maxsize=2)
+    for i, name in enumerate(["Alice", "Bob", "Charlie"]):
+        if name == "Charlie":
+            cache.get("Alice")                      # Bob is now the oldest
+        cache.fill(name, (i, name, 20, 50, "CS"), cache.version())
+    assert cache.get("Bob") is MISS
+    assert cache.get("Alice") is not MISS and cache.get("Charlie") is not MISS
+
+def test_entries_expire():
+    cache = StudentCache(ttl=0.05)
+    cache.fill("Alice", ALICE, cache.version())
+    assert cache.get("Alice") == ALICE
+    time.sleep(0.1)
+    assert cache.get("Alice") is MISS
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("student_cache ✅")
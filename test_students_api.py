@@ -0,0 +1,252 @@
+import os
+import sqlite3
+import tempfile
+import sys
+import threading
+import uuid
+
+# ─── Students API Tests ───────────────────────────────────────────
+# The in-memory structures students_api serves reads from (leaderboard,
+# grade statistics, student cache) checked against the students table
+# after concurrent writes, rows from before grades were checked, and
+# PUT /students/grades applying all of a batch or none of it.
+#
+#   pytest test_students_api.py        or        python test_students_api.py
+
+TMP = tempfile.mkdtemp()
+os.environ["STUDENTS_DB"] = os.path.join(TMP, "students.db")
+
+import students_api
+from fastapi.testclient import TestClient
+
+def fresh_db():
+    # a DatabaseManager of its own with the five sample students
+    db = students_api.DatabaseManager(os.path.join(TMP, f"{uuid.uuid4().hex}.db"))
+    for name, age, grade, course in (
+        ("Alice", 20, 85, "Computer Science"),
+        ("Bob", 22, 45, "Mathematics"),
+        ("Charlie", 21, 91, "Computer Science"),
+        ("Diana", 23, 78, "Physics"),
+        ("Eve", 20, 95, "Computer Science"),
+    ):
+        db.add_student(name, age, grade, course)
+    return db
+
+def client(db):
+    # the API served from db, signed in
+    students_api.db = db
+    students_api.app.dependency_overrides[students_api.get_current_user] = lambda: "tester"
+    return TestClient(students_api.app, raise_server_exceptions=False)
+
+def table(db):
+    with sqlite3.connect(db.db_name) as conn:
+        return sorted(conn.execute("SELECT id, name, age, grade, course FROM students"))
+
+def hammer(*workers, rounds=300):
+    # run each worker(i) for i in range(rounds) on its own thread, all of
+    # them starting round i together
+    barrier = threading.Barrier(len(workers))
+
+    def run(worker):
+        for i in range(rounds):
+            barrier.wait()
+            worker(i)
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in workers]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)         # switch threads as often as possible
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+# ─── Leaderboard ──────────────────────────────────────────────────
+
+def test_writes_apply_in_commit_order():
+    # the first write stalls between its commit and its in-memory apply for
+    # as long as it takes a second write to finish; if the second one can
+    # get through meanwhile, the leaderboard ends on the stale grade
+    db = fresh_db()
+    stalled, overtaken = threading.Event(), threading.Event()
+    update = db.leaderboard.update
+
+    def stalling_update(name, **changes):
+        if not stalled.is_set():
+            stalled.set()
+            overtaken.wait(0.5)
+        return update(name, **changes)
+
+    db.leaderboard.update = stalling_update
+    first = threading.Thread(target=db.update_grade, args=("Alice", 10))
+    first.start()
+    stalled.wait()
+    second = threading.Thread(target=lambda: (db.update_grade("Alice", 20), overtaken.set()))
+    second.start()
+    first.join()
+    second.join()
+    assert db.leaderboard.get("Alice")[3] == 20
+    assert sorted(db.leaderboard.rows.values()) == table(db)
+
+def test_leaderboard_matches_table_after_concurrent_writes():
+    # every thread writes student i in round i, so each student's last
+    # write is a race between them; the leaderboard must end on the one
+    # the table did
+    db = fresh_db()
+    for i in range(100):
+        db.add_student(f"Student {i}", 20, 50, "Course 0")
+    grade_writers = [lambda i, t=t: db.update_grade(f"Student {i}", (i * 7 + t) % 101) for t in range(6)]
+    student_writer = lambda i: db.update_student(f"Student {i}", 20 + i % 5, i % 101, f"Course {i % 3}")
+    hammer(*grade_writers, student_writer, rounds=100)
+    assert sorted(db.leaderboard.rows.values()) == table(db)
+    assert db.leaderboard.keys == sorted((-row[3], row[1]) for row in table(db))
+
+# ─── Grade Statistics ─────────────────────────────────────────────
+
+def counts(db):
+    # grade_stats' matrix as {(course, grade): n}, left out where it's 0
+    stats = db.grade_stats
+    return {(course, grade): int(stats.counts[code, grade])
+            for course, code in stats.courses.items() for grade in range(101) if stats.counts[code, grade]}
+
+def test_grade_stats_match_table_after_concurrent_writes():
+    # eight threads moving the same students between grades; each move must
+    # come off the cell the student was really in
+    db = fresh_db()
+    names = ["Alice", "Bob", "Charlie", "Diana", "Eve"]
+    writers = [lambda i, t=t: db.update_grade(names[(i + t) % 5], (i * 13 + t) % 101) for t in range(8)]
+    hammer(*writers)
+    assert (db.grade_stats.counts >= 0).all()
+    with sqlite3.connect(db.db_name) as conn:
+        assert counts(db) == {(course, grade): n for course, grade, n in conn.execute(
+            "SELECT course, grade, COUNT(*) FROM students GROUP BY course, grade")}
+
+def test_legacy_grade_outside_the_range():
+    # a row from before grades were checked loads, updates and deletes cleanly
+    db = fresh_db()
+    with sqlite3.connect(db.db_name) as conn:
+        conn.execute("INSERT INTO students (name, age, grade, course) VALUES ('Old', 30, 150, 'Physics')")
+    db = students_api.DatabaseManager(db.db_name)
+    assert db.grade_stats.out_of_range == 1
+    assert counts(db)[("Physics", 100)] == 1
+    assert db.update_grade("Old", 70)
+    assert ("Physics", 100) not in counts(db)
+    assert counts(db)[("Physics", 70)] == 1
+    assert db.delete_student("Old")
+    assert ("Physics", 70) not in counts(db)
+
+# ─── Student Cache ────────────────────────────────────────────────
+
+def test_cached_reads_follow_writes():
+    db = fresh_db()
+    assert db.get_student("Alice")[3] == 85         # cached from here
+    assert db.get_student("Zed") is None            # cached as missing
+    db.update_grade("Alice", 60)
+    assert db.get_student("Alice")[3] == 60
+    db.update_student("Alice", 21, 70, "Physics")
+    assert db.get_student("Alice")[2:] == (21, 70, "Physics")
+    db.update_grades([("Alice", 75)])
+    assert db.get_student("Alice")[3] == 75
+    db.add_student("Zed", 19, 40, "Math")
+    assert db.get_student("Zed")[1:] == ("Zed", 19, 40, "Math")
+    db.delete_student("Alice")
+    assert db.get_student("Alice") is None
+    assert sorted(filter(None, map(db.get_student, ["Alice", "Bob", "Charlie", "Diana", "Eve", "Zed"]))) == table(db)
+
+def test_read_racing_a_write_is_not_cached():
+    # the read finds the old grade, then the write commits before it fills
+    db = fresh_db()
+    db.student_cache.clear()                        # so the read goes to the table
+    fill = db.student_cache.fill
+
+    def late_fill(name, row, version):
+        db.update_grade(name, 10)
+        return fill(name, row, version)
+
+    db.student_cache.fill = late_fill
+    assert db.get_student("Alice")[3] == 85         # what it read
+    db.student_cache.fill = fill
+    assert db.get_student("Alice")[3] == 10
+
+# ─── Grade Batches ────────────────────────────────────────────────
+
+def test_batch_with_an_invalid_grade_changes_nothing():
+    db = fresh_db()
+    before = table(db)
+    response = client(db).put("/students/grades", json=[
+        {"name": "Alice", "grade": 90}, {"name": "Bob", "grade": 101},
+        {"name": "Charlie", "grade": 70}, {"name": "Diana", "grade": -1},
+    ])
+    assert response.status_code == 400
+    assert response.json()["detail"]["invalid"] == [
+        {"index": 1, "name": "Bob", "grade": 101}, {"index": 3, "name": "Diana", "grade": -1}]
+    assert table(db) == before
+    assert sorted(db.leaderboard.rows.values()) == before
+
+def test_batch_reports_each_name():
+    # a name twice is applied in order, so its last grade wins
+    db = fresh_db()
+    response = client(db).put("/students/grades", json=[
+        {"name": "Alice", "grade": 60}, {"name": "Zed", "grade": 70}, {"name": "Alice", "grade": 65},
+    ])
+    assert response.status_code == 200
+    assert response.json() == {"updated": 2, "not_found": 1, "results": [
+        {"name": "Alice", "grade": 60, "status": "updated"},
+        {"name": "Zed", "grade": 70, "status": "not_found"},
+        {"name": "Alice", "grade": 65, "status": "updated"},
+    ]}
+    assert db.get_student("Alice")[3] == 65
+    assert sorted(db.leaderboard.rows.values()) == table(db)
+
+def test_batch_that_fails_midway_rolls_back():
+    # the updates have run when the version bump fails; none of them stays
+    db = fresh_db()
+    before = table(db)
+    version = db.students_version()
+
+    def failing_bump(conn):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    db._bump_version = failing_bump
+    response = client(db).put("/students/grades", json=[
+        {"name": "Alice", "grade": 10}, {"name": "Bob", "grade": 20}])
+    assert response.status_code == 500
+    del db._bump_version
+    assert table(db) == before
+    assert db.students_version() == version
+    assert sorted(db.leaderboard.rows.values()) == before
+    assert db.get_student("Alice")[3] == 85
+    assert db.update_grades([("Alice", 10)]) == [True]      # the lock was released
+
+# ─── Name Index ───────────────────────────────────────────────────
+
+def test_duplicate_names_refuse_to_start():
+    # a table from before the unique index: nothing is deleted, the
+    # duplicates are reported for the operator to resolve
+    path = os.path.join(TMP, f"{uuid.uuid4().hex}.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE students (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                      "age INTEGER, grade INTEGER, course TEXT)")
+        conn.executemany("INSERT INTO students (name, age, grade, course) VALUES (?, 20, 50, 'CS')",
+                         [("Alice",), ("Bob",), ("Alice",), ("Carol",), ("Bob",), ("Alice",)])
+    try:
+        students_api.DatabaseManager(path)
+    except students_api.DuplicateNames as error:
+        assert error.duplicates == [("Alice", "1,3,6"), ("Bob", "2,5")]
+        assert "'Alice' (ids 1,3,6)" in str(error)
+    else:
+        raise AssertionError("expected DuplicateNames")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM students").fetchone()[0] == 6
+        conn.execute("UPDATE students SET name = name || id WHERE id IN (3, 5, 6)")
+    db = students_api.DatabaseManager(path)         # starts once they're resolved
+    assert not db.add_student("Alice", 20, 50, "CS")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("students_api ✅")